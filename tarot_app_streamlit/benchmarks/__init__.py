@@ -0,0 +1 @@
+# Offline benchmarks of the bots (run from tarot_app_streamlit/, e.g. python -m benchmarks.load_benchmark)
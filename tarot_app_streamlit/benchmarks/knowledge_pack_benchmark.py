@@ -0,0 +1,70 @@
+"""
+Cold start & resident memory of the knowledge base: CSV path vs memory-mapped pack.
+
+    python -m benchmarks.knowledge_pack_benchmark --runs 10
+
+Every run is a fresh Python process that imports the modules, loads the knowledge base
+and looks up every (card, topic) once. Private memory (RssAnon) is what each server
+worker pays on its own; file-backed pages (RssFile) of the pack are shared between workers.
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+import pandas as pd
+
+from tarot_ai.knowledge_base import DATA_DIR
+from tarot_ai.knowledge_pack import PACK_PATH, build_pack
+
+CHILD = r"""
+import json, time
+
+def rss():
+    with open('/proc/self/status') as f:
+        fields = dict(line.split(':', 1) for line in f)
+    return {k: int(fields[k].split()[0]) / 1024 for k in ('RssAnon', 'RssFile')}
+
+from tarot_ai.knowledge_base import TOPICS, load_knowledge_base
+from tarot_ai.knowledge_pack import KnowledgePack
+
+before = rss()
+start = time.perf_counter()
+kb = load_knowledge_base() if MODE == 'csv' else KnowledgePack()
+loaded = time.perf_counter()
+for topic in TOPICS:
+    kb.get_card_keywords(kb.cards, topic)
+    kb.get_card_summaries(kb.cards, topic)
+    kb.get_card_interpretations(kb.cards, topic)
+done = time.perf_counter()
+after = rss()
+
+print(json.dumps({
+    'load_ms': (loaded - start) * 1000,
+    'first_lookups_ms': (done - loaded) * 1000,
+    'rss_anon_mb': after['RssAnon'] - before['RssAnon'],
+    'rss_file_mb': after['RssFile'] - before['RssFile'],
+}))
+"""
+
+
+def run_once(mode):
+    output = subprocess.run(
+        [sys.executable, "-c", f"MODE = {mode!r}\n" + CHILD],
+        cwd=DATA_DIR, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Knowledge base cold start benchmark")
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    if not PACK_PATH.exists():
+        build_pack()
+
+    results = pd.DataFrame([
+        {"mode": mode, **run_once(mode)} for mode in ("csv", "pack") for _ in range(args.runs)
+    ])
+    print(results.groupby("mode").median().round(2).to_string())
@@ -0,0 +1,139 @@
+"""
+Load benchmark: runs the bots' generate_prediction pipelines at increasing concurrency
+against the local mock OpenAI server (or any compatible endpoint via --base-url).
+
+    python -m benchmarks.load_benchmark --concurrency 1 4 16 --readings 32
+
+Reports throughput, tail latency and GPT calls per reading for every bot & concurrency level.
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+# Keep benchmark calls out of the app's caches & logs
+os.environ.setdefault("TAROT_CACHE_DIR", tempfile.mkdtemp(prefix="tarot_benchmark_"))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+from openai import OpenAI  # noqa: E402
+
+from benchmarks.mock_openai_server import add_settings_arguments, settings_from_args, start_mock_server  # noqa: E402
+from tarot_ai import llm  # noqa: E402
+from tarot_ai.scheduler import LLMScheduler, set_scheduler  # noqa: E402
+from tarot_ai.bots import hybrid, keyword_based, prompt_based, summarization_based  # noqa: E402
+from tarot_ai.knowledge_base import load_knowledge_base  # noqa: E402
+
+BOTS = {
+    prompt_based.BOT: prompt_based.generate_prediction,
+    keyword_based.BOT: keyword_based.generate_prediction,
+    summarization_based.BOT: summarization_based.generate_prediction,
+    hybrid.BOT: hybrid.generate_prediction,
+}
+
+SAMPLE_QUERIES = [
+    ("Career", "I have worked as a junior developer for two years and I was invited to an interview at a bigger company", "Will I get the job offer?"),
+    ("Career", "My manager keeps giving me more projects but never talks about a promotion", "Should I ask for a promotion now?"),
+    ("Finances", "I have some savings and I am thinking about investing them instead of keeping them in the bank", "Is it a good time to invest?"),
+    ("Finances", "My salary barely covers my rent and I have a small debt from university", "Will my financial situation improve this year?"),
+    ("Love", "I met someone at a friend's party and we have been texting every day for a month", "Will this turn into a relationship?"),
+    ("Love", "My partner and I argue more often lately and I feel we are drifting apart", "Should I stay in this relationship?"),
+    ("Other", "I moved to a new city a few months ago and I still feel lonely and a bit lost", "What should I focus on right now?"),
+    ("Other", "I am choosing between staying close to my family and moving abroad to study", "Which path will make me happier?"),
+]
+
+
+# Scheduler limits: unlimited by default, so the benchmark measures the pipelines themselves
+def add_scheduler_arguments(parser):
+    parser.add_argument("--rpm", type=int, default=0, help="scheduler requests per minute (0 = unlimited)")
+    parser.add_argument("--tpm", type=int, default=0, help="scheduler tokens per minute (0 = unlimited)")
+    parser.add_argument("--llm-concurrency", type=int, default=64, help="GPT calls in flight")
+
+
+def scheduler_from_args(args):
+    return LLMScheduler(rpm=args.rpm, tpm=args.tpm, max_concurrency=args.llm_concurrency)
+
+
+def fetch_server_stats(base_url, reset=False):
+    url = base_url.rsplit("/v1", 1)[0] + ("/reset" if reset else "/stats")
+    request = urllib.request.Request(url, method="POST" if reset else "GET", data=b"" if reset else None)
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())
+
+
+def run_level(generate, cards, concurrency, readings, base_url):
+    def one_reading(i):
+        topic, story, question = SAMPLE_QUERIES[i % len(SAMPLE_QUERIES)]
+        drawn = random.sample(cards, 3)
+        user_input = {
+            "topic": topic,
+            "story": story,
+            "question": question,
+            "card_1": drawn[0],
+            "card_2": drawn[1],
+            "card_3": drawn[2]
+        }
+        start = time.perf_counter()
+        generate(user_input)
+        return time.perf_counter() - start
+
+    fetch_server_stats(base_url, reset=True)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = np.array(list(executor.map(one_reading, range(readings))))
+    wall_seconds = time.perf_counter() - start
+    stats = fetch_server_stats(base_url)
+
+    return {
+        "concurrency": concurrency,
+        "readings": readings,
+        "throughput_rps": round(readings / wall_seconds, 3),
+        "p50_s": round(float(np.percentile(latencies, 50)), 3),
+        "p95_s": round(float(np.percentile(latencies, 95)), 3),
+        "p99_s": round(float(np.percentile(latencies, 99)), 3),
+        "calls_per_reading": round(stats["requests"] / readings, 2),
+        "max_in_flight": stats["max_in_flight"],
+    }
+
+
+def run_benchmark(bots, concurrency_levels, readings, base_url, use_cache=False):
+    llm.set_client(OpenAI(api_key="benchmark", base_url=base_url, max_retries=0))
+    llm.CACHE_ENABLED = use_cache
+    cards = list(load_knowledge_base().cards)
+
+    results = []
+    for bot in bots:
+        for concurrency in concurrency_levels:
+            result = run_level(BOTS[bot], cards, concurrency, readings, base_url)
+            results.append({"bot": bot, **result})
+            print(f"{bot:>20} x{concurrency:<3} {result['throughput_rps']:>7} readings/s  "
+                  f"p95 {result['p95_s']} s  {result['calls_per_reading']} calls/reading")
+    return pd.DataFrame(results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load benchmark of the Tarot AI bots")
+    parser.add_argument("--bots", nargs="+", choices=list(BOTS), default=list(BOTS))
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 2, 4, 8, 16])
+    parser.add_argument("--readings", type=int, default=32, help="readings per concurrency level")
+    parser.add_argument("--base-url", help="use an already running endpoint instead of starting the mock server")
+    parser.add_argument("--use-cache", action="store_true", help="keep the response cache enabled")
+    add_scheduler_arguments(parser)
+    parser.add_argument("--output", help="save the results as CSV")
+    add_settings_arguments(parser)
+    args = parser.parse_args()
+
+    base_url = args.base_url
+    if base_url is None:
+        base_url = start_mock_server(settings_from_args(args)).base_url
+
+    set_scheduler(scheduler_from_args(args))
+    results = run_benchmark(args.bots, args.concurrency, args.readings, base_url, use_cache=args.use_cache)
+    print()
+    print(results.to_string(index=False))
+    if args.output:
+        results.to_csv(args.output, index=False)
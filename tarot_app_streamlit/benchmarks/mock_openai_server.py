@@ -0,0 +1,229 @@
+"""
+Local stand-in for the OpenAI chat completions endpoint.
+
+    python -m benchmarks.mock_openai_server --port 8900 --latency lognormal --latency-ms 800
+
+Answers POST /v1/chat/completions (plain & streaming) after a simulated delay,
+GET /stats returns the request counters and POST /reset clears them.
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WORDS = ("the cards whisper of change patience courage new beginnings trust your intuition "
+         "a door opens where another closes balance your heart and mind").split()
+CARD_NAME = re.compile(r"^\s*(?:- |Name\s*[–-]\s*)Card ([123]): (.+)$", re.MULTILINE)
+
+
+class MockSettings:
+    def __init__(self, latency="lognormal", latency_ms=800.0, jitter=0.5, token_ms=10.0,
+                 completion_tokens=250, prompt_token_ratio=4.0):
+        self.latency = latency  # fixed / uniform / lognormal
+        self.latency_ms = latency_ms  # median time to first token
+        self.jitter = jitter  # spread of the distribution
+        self.token_ms = token_ms  # time per generated token
+        self.completion_tokens = completion_tokens
+        self.prompt_token_ratio = prompt_token_ratio  # characters per prompt token
+
+    def first_token_delay(self):
+        if self.latency == "fixed":
+            return self.latency_ms / 1000
+        if self.latency == "uniform":
+            low = self.latency_ms * (1 - self.jitter)
+            return random.uniform(low, self.latency_ms * (1 + self.jitter)) / 1000
+        return random.lognormvariate(0, self.jitter) * self.latency_ms / 1000
+
+
+def _answer(messages, completion_tokens, response_format=None):
+    last_message = messages[-1]["content"] if messages else ""
+    if "ensure the user's query is clear" in last_message or last_message.startswith("Task: Validation"):
+        return "The query is clear."
+    if "Respond only with the keywords" in last_message:
+        return ", ".join(random.sample(WORDS, 6))
+    words = [random.choice(WORDS) for _ in range(completion_tokens)]
+    paragraphs = [" ".join(words[i:i + 40]).capitalize() + "." for i in range(0, len(words), 40)]
+
+    # JSON-schema answers: every string field gets a paragraph, every boolean is true
+    if response_format and response_format.get("type") == "json_schema":
+        properties = response_format["json_schema"]["schema"]["properties"]
+        return json.dumps({
+            name: True if field["type"] == "boolean" else paragraphs[i % len(paragraphs)]
+            for i, (name, field) in enumerate(properties.items())
+        })
+
+    # Card names from the input data (if the prompt has them)
+    names = dict(CARD_NAME.findall(last_message))
+    text = paragraphs[0] + "\n\n"
+    for number, paragraph in enumerate(paragraphs[1:4], start=1):
+        text += f"**Card №{number}: {names.get(str(number), 'Card')}**\n{paragraph}\n\n"
+    # The last paragraph reads like a conclusion
+    rest = paragraphs[4:]
+    if rest:
+        rest[-1] = "Overall, " + rest[-1][0].lower() + rest[-1][1:]
+    return text + "\n\n".join(rest)
+
+
+class MockOpenAIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, settings):
+        super().__init__(address, MockHandler)
+        self.settings = settings
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.prefixes = set()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def stats(self):
+        with self.lock:
+            return {"requests": self.requests, "in_flight": self.in_flight, "max_in_flight": self.max_in_flight}
+
+    def reset(self):
+        with self.lock:
+            self.requests = 0
+            self.max_in_flight = self.in_flight
+            self.prefixes.clear()
+
+    # Prompt caching like the API: a first message seen before is served from the cache
+    # in blocks of 128 tokens, once it is at least 1024 tokens long
+    def cached_tokens(self, messages):
+        prefix = messages[0].get("content", "") if messages else ""
+        tokens = int(len(prefix) / self.settings.prompt_token_ratio)
+        with self.lock:
+            seen = prefix in self.prefixes
+            self.prefixes.add(prefix)
+        return tokens // 128 * 128 if seen and tokens >= 1024 else 0
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/stats":
+            return self._send_json(self.server.stats())
+        self._send_json({"error": "not found"}, status=404)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+
+        if self.path.rstrip("/") == "/reset":
+            self.server.reset()
+            return self._send_json(self.server.stats())
+        if not self.path.endswith("/chat/completions"):
+            return self._send_json({"error": "not found"}, status=404)
+
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            self._complete(payload)
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def _complete(self, payload):
+        settings = self.server.settings
+        messages = payload.get("messages", [])
+        text = _answer(messages, settings.completion_tokens, payload.get("response_format"))
+        chunks = [word + " " for word in text.split(" ")]
+        prompt_chars = sum(len(m.get("content", "")) for m in messages)
+        usage = {
+            "prompt_tokens": int(prompt_chars / settings.prompt_token_ratio),
+            "completion_tokens": len(chunks),
+            "total_tokens": int(prompt_chars / settings.prompt_token_ratio) + len(chunks),
+            "prompt_tokens_details": {"cached_tokens": self.server.cached_tokens(messages)},
+        }
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        model = payload.get("model", "gpt-4o")
+        token_delay = settings.token_ms / 1000
+
+        time.sleep(settings.first_token_delay())
+
+        if not payload.get("stream"):
+            time.sleep(token_delay * len(chunks))
+            return self._send_json({
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": text}}],
+                "usage": usage,
+            })
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def send_event(data):
+            event = f"data: {data}\n\n".encode('utf-8')
+            self.wfile.write(f"{len(event):x}\r\n".encode() + event + b"\r\n")
+            self.wfile.flush()
+
+        base = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": model}
+        for chunk in chunks:
+            send_event(json.dumps({**base, "choices": [{"index": 0, "delta": {"content": chunk}, "finish_reason": None}]}))
+            time.sleep(token_delay)
+        send_event(json.dumps({**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}))
+        if payload.get("stream_options", {}).get("include_usage"):
+            send_event(json.dumps({**base, "choices": [], "usage": usage}))
+        send_event("[DONE]")
+        self.wfile.write(b"0\r\n\r\n")
+
+
+# Start the server in a background thread (used by the load benchmark)
+def start_mock_server(settings=None, host="127.0.0.1", port=0):
+    server = MockOpenAIServer((host, port), settings or MockSettings())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def add_settings_arguments(parser):
+    parser.add_argument("--latency", choices=["fixed", "uniform", "lognormal"], default="lognormal")
+    parser.add_argument("--latency-ms", type=float, default=800.0, help="median time to first token")
+    parser.add_argument("--jitter", type=float, default=0.5, help="spread of the latency distribution")
+    parser.add_argument("--token-ms", type=float, default=10.0, help="time per generated token")
+    parser.add_argument("--completion-tokens", type=int, default=250)
+
+
+def settings_from_args(args):
+    return MockSettings(latency=args.latency, latency_ms=args.latency_ms, jitter=args.jitter,
+                        token_ms=args.token_ms, completion_tokens=args.completion_tokens)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mock OpenAI chat completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    add_settings_arguments(parser)
+    args = parser.parse_args()
+
+    server = MockOpenAIServer((args.host, args.port), settings_from_args(args))
+    print(f"Mock OpenAI server on {server.base_url}")
+    server.serve_forever()
@@ -0,0 +1,355 @@
+"""
+Regression checks of fixed bugs, against local stand-ins (the mock OpenAI server, a slow web
+server): no real API calls or sites.
+
+    python -m benchmarks.regression_checks
+    python -m benchmarks.regression_checks --only fresh_samples
+
+Exits with status 1 if a check fails.
+"""
+import argparse
+import json
+import logging
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from types import SimpleNamespace
+
+# Keep check calls out of the app's caches & logs
+os.environ.setdefault("TAROT_CACHE_DIR", tempfile.mkdtemp(prefix="tarot_checks_"))
+
+from openai import OpenAI  # noqa: E402
+
+from benchmarks.mock_openai_server import MockSettings, start_mock_server  # noqa: E402
+from tarot_ai import llm, prefetch, semantic_cache  # noqa: E402
+from tarot_ai.bots import keyword_based, prompt_based  # noqa: E402
+from tarot_ai.ingestion.fetcher import Fetcher  # noqa: E402
+from tarot_ai.prefetch import get_prefetch_stats, prefetch_for_topic, take_prefetch  # noqa: E402
+from tarot_ai.query_screener import REJECT_RESPONSE, QueryScreener  # noqa: E402
+from tarot_ai.service import start_service  # noqa: E402
+from tarot_ai.structure import check_structure  # noqa: E402
+from tarot_ai.timeline import StageTimeline  # noqa: E402
+
+SAMPLES = 5
+PAGE_DELAY_S = 0.2
+
+
+def _concurrent_calls(mock, n, **kwargs):
+    messages = [{"role": "user", "content": "Give three keywords of The Fool in Career"}]
+    mock.reset()
+    with ThreadPoolExecutor(max_workers=n) as executor:
+        list(executor.map(lambda _: llm.get_model_response(messages, stage="keywords", bot="checks", **kwargs),
+                          range(n)))
+    return mock.stats()["requests"]
+
+
+# use_cache=False samples (self-consistency) must each be a real call, not coalesced into one
+def check_fresh_samples(mock):
+    requests = _concurrent_calls(mock, SAMPLES, use_cache=False)
+    assert requests == SAMPLES, f"{SAMPLES} concurrent use_cache=False calls sent {requests} requests"
+    # Identical default calls still share one answer
+    requests = _concurrent_calls(mock, SAMPLES)
+    assert requests < SAMPLES, f"{SAMPLES} concurrent identical calls weren't coalesced ({requests} requests)"
+
+
+class SlowPageHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        time.sleep(PAGE_DELAY_S)
+        body = b"<html><body>The Fool</body></html>"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+# Successful pages must report their network time (the fetcher's latency stats)
+def check_fetch_seconds(mock):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SlowPageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        fetcher = Fetcher(max_workers=4, rate_per_host=0)
+        urls = [f"http://127.0.0.1:{server.server_address[1]}/page/{i}" for i in range(4)]
+        seconds = [result.seconds for result in fetcher.fetch_all(urls)]
+    finally:
+        server.shutdown()
+    assert all(value >= PAGE_DELAY_S * 0.9 for value in seconds), f"per-page seconds {seconds}"
+    assert fetcher.stats()["p50_s"] >= PAGE_DELAY_S * 0.9, f"stats {fetcher.stats()}"
+
+
+# Queries that only look off-topic are left to GPT; clear-cut bad ones are still rejected locally
+def check_screener_topics(mock):
+    screener = QueryScreener(log_path=Path(tempfile.mkdtemp(prefix="tarot_checks_")) / "validations.jsonl")
+    lost_job = {"topic": "Finances", "story": "I was fired from my job last month and I have savings for a while",
+                "question": "Will I find a new job soon?"}
+    assert screener.screen(lost_job) != "reject", "a lost job under Finances was rejected locally"
+    assert screener.screen({**lost_job, "story": "job"}) is None, "a one-word story wasn't left to GPT"
+    assert screener.screen({**lost_job, "question": "Career?"}) is None, "a one-word question wasn't left to GPT"
+    assert screener.screen({**lost_job, "story": "....."}) == "reject", "a story without words wasn't rejected"
+    assert screener.screen({**lost_job, "story": "Sooooo I was fired from my job....."}) != "reject", \
+        "an emphatic story was rejected locally"
+    screener.record(lost_job, None, "accept")
+    log = screener.log_path.read_text(encoding="utf-8")
+    assert lost_job["story"] not in log and "fired" not in log, "user text in the screener log"
+    assert screener.screen({**lost_job, "question": "xqzvt bcdfg kkkkkk"}) == "reject", "gibberish wasn't rejected"
+
+
+# Client of the mock server whose structured-output answers are refusals (message.content is None)
+class RefusingClient:
+    def __init__(self, client):
+        self.client = client
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        if "response_format" not in kwargs:
+            return self.client.chat.completions.create(**kwargs)
+        message = SimpleNamespace(content=None, refusal="I'm sorry, I can't help with that.")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+
+# A refused single-call answer falls back to the chain of calls instead of raising
+def check_single_call_refusal(mock):
+    user_input = {"topic": "Career", "story": "I work as an engineer and have an interview next week",
+                  "question": "Will I get the job?", "card_1": "The Fool", "card_2": "The Magician",
+                  "card_3": "The Sun"}
+    client = llm.get_client()
+    llm.set_client(RefusingClient(client))
+    timeline = StageTimeline()
+    try:
+        prediction = keyword_based.generate_prediction(user_input, timeline=timeline, single_call=True)
+    finally:
+        llm.set_client(client)
+    assert isinstance(prediction, str) and prediction != REJECT_RESPONSE, f"prediction {prediction!r}"
+    stages = set(timeline.to_frame()["stage"])
+    assert "preliminary" in stages, f"the chain didn't run (stages {stages})"
+
+
+# Cached structured-output calls: refusals aren't stored and don't answer the plain-text call
+def check_response_cache_format(mock):
+    messages = [{"role": "user", "content": f"Describe The Star card ({time.time()})"}]
+    response_format = {"type": "json_object"}
+    client = llm.get_client()
+    llm.set_client(RefusingClient(client))
+    try:
+        refused = llm.get_model_response(messages, use_cache=True, response_format=response_format)
+    finally:
+        llm.set_client(client)
+    assert refused is None, f"refusal {refused!r}"
+    answer = llm.get_model_response(messages, use_cache=True)
+    assert answer, f"plain-text answer {answer!r}"
+    formatted = llm.get_model_response(messages, use_cache=True, response_format=response_format)
+    assert formatted != answer, "the plain-text answer was served to the structured-output call"
+
+
+# Client of the mock server that rejects every query in the validation stage
+class RejectingClient(RefusingClient):
+    def create(self, **kwargs):
+        if not kwargs["messages"][-1]["content"].startswith("Task: Validation"):
+            return self.client.chat.completions.create(**kwargs)
+        message = SimpleNamespace(content=REJECT_RESPONSE, refusal=None)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+
+# Semantic cache hits are validated first, personalized readings aren't cached, the log has no user text
+def check_semantic_cache_hits(mock):
+    user_input = {"topic": "Career", "story": "Things are strange lately", "question": "What happens next?",
+                  "card_1": "Death", "card_2": "The Hermit", "card_3": "Justice"}
+    enabled = semantic_cache.ENABLED
+    semantic_cache.ENABLED = True
+    cache = semantic_cache.get_semantic_cache()
+    client = llm.get_client()
+    try:
+        semantic_cache.generate_with_cache("keyword_based", keyword_based.generate_prediction, user_input)
+        entries = cache.stats()["entries"]
+        # Same cards in another order -> personalized
+        semantic_cache.generate_with_cache("keyword_based", keyword_based.generate_prediction,
+                                           {**user_input, "card_1": "Justice", "card_3": "Death"})
+        assert cache.stats()["entries"] == entries, "a personalized reading was cached"
+
+        # A similar query that the validation rejects
+        llm.set_client(RejectingClient(client))
+        prediction = semantic_cache.generate_with_cache("keyword_based", keyword_based.generate_prediction,
+                                                        {**user_input, "story": "Things are so strange lately"})
+    finally:
+        llm.set_client(client)
+        semantic_cache.ENABLED = enabled
+    assert prediction == REJECT_RESPONSE, f"a hit was served to a rejected query: {prediction[:80]!r}"
+    log = cache.log_path.read_text(encoding='utf-8')
+    assert user_input["question"] not in log and user_input["story"] not in log, "user text in the lookup log"
+
+
+def _service_address(service):
+    return service.server.sockets[0].getsockname()[:2]
+
+
+# A malformed Content-Length gets a 400, not a dropped connection
+def check_service_content_length(mock):
+    service = start_service(workers=1, queue_size=1)
+    with socket.create_connection(_service_address(service), timeout=5) as connection:
+        connection.sendall(b"POST /v1/predictions HTTP/1.1\r\nContent-Length: abc\r\n\r\n")
+        status_line = connection.makefile("rb").readline()
+    assert status_line.startswith(b"HTTP/1.1 400"), f"status line {status_line!r}"
+
+
+# A streaming client that leaves early keeps its reading admitted until the worker is done
+def check_service_disconnect(mock):
+    service = start_service(workers=1, queue_size=1)
+    payload = json.dumps({"bot": "keyword_based", "topic": "Career", "stream": True,
+                          "story": "I left a stable job to start a bakery with two friends",
+                          "question": "Will the bakery grow this year?"}).encode('utf-8')
+    with socket.create_connection(_service_address(service), timeout=5) as connection:
+        connection.sendall(b"POST /v1/predictions HTTP/1.1\r\nContent-Type: application/json\r\n"
+                           + f"Content-Length: {len(payload)}\r\n\r\n".encode() + payload)
+        connection.makefile("rb").readline()  # status line: the reading is running
+    deadline = time.monotonic() + 30
+    while service.counters["failed"] + service.counters["completed"] == 0 or service.stats()["running"]:
+        assert service.stats()["queued"] >= 0, f"admitted readings undercounted: {service.stats()}"
+        assert time.monotonic() < deadline, f"the reading didn't finish: {service.stats()}"
+        time.sleep(0.01)
+    time.sleep(0.1)
+    assert service.admitted == 0, f"admitted readings left after the worker finished: {service.stats()}"
+
+
+# Client whose every call fails with an error that must not reach the service's clients
+class FailingClient:
+    def __init__(self):
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        raise RuntimeError("internal detail: /srv/secrets")
+
+
+# A failed reading answers with a generic error, streamed or not
+def check_service_error_message(mock):
+    service = start_service(workers=1, queue_size=1)
+    client = llm.get_client()
+    llm.set_client(FailingClient())
+    service_logger = logging.getLogger("tarot_ai.service")
+    level = service_logger.level
+    service_logger.setLevel(logging.CRITICAL)  # the traceback is expected in the server log
+    try:
+        for stream in (False, True):
+            payload = json.dumps({"bot": "keyword_based", "topic": "Career", "stream": stream,
+                                  "story": f"I left a stable job to start a bakery ({time.time()})",
+                                  "question": "Will the bakery grow this year?"}).encode('utf-8')
+            with socket.create_connection(_service_address(service), timeout=30) as connection:
+                connection.sendall(b"POST /v1/predictions HTTP/1.1\r\nContent-Type: application/json\r\n"
+                                   + b"Connection: close\r\n"
+                                   + f"Content-Length: {len(payload)}\r\n\r\n".encode() + payload)
+                response = connection.makefile("rb").read()
+            assert b"error" in response and b"/srv/secrets" not in response, f"response {response!r}"
+    finally:
+        llm.set_client(client)
+        service_logger.setLevel(level)
+
+
+# A prefetched stage made useless by a semantic cache hit is counted as wasted
+def check_prefetch_cache_hit(mock):
+    user_input = {"topic": "Love", "story": "My partner and I argue more often and we are drifting apart",
+                  "question": "Should I stay in this relationship?", "card_1": "The Lovers",
+                  "card_2": "The Tower", "card_3": "The Star"}
+    cards = [user_input['card_1'], user_input['card_2'], user_input['card_3']]
+    enabled = semantic_cache.ENABLED
+    semantic_cache.ENABLED = True
+    try:
+        semantic_cache.generate_with_cache("prompt_based", prompt_based.generate_prediction, user_input)
+        stats = get_prefetch_stats()
+        stats.count("started")
+        stats.count("used")  # taken by the page
+        work = llm.get_executor().submit(prompt_based.interpret_cards, user_input['topic'], cards)
+        semantic_cache.generate_with_cache("prompt_based", prompt_based.generate_prediction, user_input,
+                                           prefetched_interpretation=work)
+    finally:
+        semantic_cache.ENABLED = enabled
+    result = stats.stats()
+    assert result["wasted_reasons"].get("cache hit") == 1 and result["pending"] == 0, f"prefetch stats {result}"
+
+
+# No new prefetch right after a reading, only once the story is edited; past the cap only cards are drawn
+def check_prefetch_trigger(mock):
+    cards = ["The Fool", "The Magician", "The Sun", "The Moon", "The Star"]
+    # Session state works outside `streamlit run`, it only warns on every access
+    for name in ("streamlit.runtime.scriptrunner_utils.script_run_context",
+                 "streamlit.runtime.state.session_state_proxy"):
+        logging.getLogger(name).setLevel(logging.ERROR)
+    stats = get_prefetch_stats()
+    before = stats.stats()
+    max_wasted = prefetch.MAX_WASTED_CALLS_PER_HOUR
+    prefetch.MAX_WASTED_CALLS_PER_HOUR = before["wasted_calls_last_hour"] + 1
+    try:
+        prefetch_for_topic("Love", "story", cards, work=lambda topic, drawn: topic)
+        take_prefetch("Love")
+        assert prefetch_for_topic("Love", "story", cards) is None, "a prefetch started right after the reading"
+        edited = prefetch_for_topic("Love", "edited story", cards, work=lambda topic, drawn: topic)
+        edited.work.result()
+        capped = prefetch_for_topic("Career", "edited story", cards, work=lambda topic, drawn: topic)
+    finally:
+        prefetch.MAX_WASTED_CALLS_PER_HOUR = max_wasted
+    result = stats.stats()
+    assert result["started"] - before["started"] == 3, f"prefetch stats {result}"
+    assert result["wasted_calls"] - before["wasted_calls"] == 1, f"wasted call not counted: {result}"
+    assert capped.work is None and result["capped"] - before["capped"] == 1, f"cap not applied: {result}"
+
+
+def _reading(card_1_header, card_3_paragraphs):
+    body = "This card speaks of a fresh start at work, a leap of faith that brings new energy and chances."
+    return "\n\n".join(["Dear friend, thank you for sharing your story about your career and hopes.",
+                        f"{card_1_header}\n{body}", f"**Card №2: The Sun**\n{body}",
+                        "**Card №3: The Moon**\n" + "\n\n".join([body] * card_3_paragraphs),
+                        "Overall, the path ahead is bright if you trust yourself and keep going."])
+
+
+# Headers keep the draft's right card names; card 3 without a separate conclusion doesn't pass
+def check_structure_layout(mock):
+    cards = ["Fool", "Sun", "Moon"]
+    result = check_structure(_reading("**Card №1:** The Fool", 1), cards)
+    assert result.passed and "**Card №1: The Fool**\nThis card" in result.text, f"closing '**': {result}"
+    text = _reading("**Card №1: The Fool**", 1)
+    result = check_structure(text, cards)
+    assert result.passed and result.text == text and not result.fixes, f"correct text rewritten: {result}"
+    result = check_structure(_reading("**Card №1: The Fool**", 2).rsplit("\n\n", 1)[0], cards)
+    assert not result.passed and "no conclusion" in result.issues, f"card 3 body taken as the conclusion: {result}"
+
+
+CHECKS = {
+    "fresh_samples": check_fresh_samples,
+    "fetch_seconds": check_fetch_seconds,
+    "screener_topics": check_screener_topics,
+    "single_call_refusal": check_single_call_refusal,
+    "response_cache_format": check_response_cache_format,
+    "service_content_length": check_service_content_length,
+    "service_disconnect": check_service_disconnect,
+    "service_error_message": check_service_error_message,
+    "prefetch_cache_hit": check_prefetch_cache_hit,
+    "prefetch_trigger": check_prefetch_trigger,
+    "semantic_cache_hits": check_semantic_cache_hits,
+    "structure_layout": check_structure_layout,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Regression checks of fixed bugs against local stand-ins")
+    parser.add_argument("--only", nargs="+", choices=list(CHECKS), default=list(CHECKS))
+    args = parser.parse_args()
+
+    mock = start_mock_server(MockSettings(latency="fixed", latency_ms=200, token_ms=0, completion_tokens=20))
+    llm.set_client(OpenAI(api_key="checks", base_url=mock.base_url, max_retries=0))
+
+    failed = 0
+    for name in args.only:
+        try:
+            CHECKS[name](mock)
+            print(f"ok    {name}")
+        except AssertionError as error:
+            failed += 1
+            print(f"FAIL  {name}: {error}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,199 @@
+"""
+Rerun benchmark: starts the app with `streamlit run` and plays user sessions over the websocket
+the way the browser does (widgets in a form only send their values on submit, widgets in a
+fragment only rerun the fragment). Counts script runs and the server's CPU time per session.
+
+    python -m benchmarks.rerun_benchmark --page Keyword-based_Bot --sessions 5
+
+Compare with another version of the pages (e.g. before the form & fragment):
+
+    git worktree add /tmp/tarot_before <commit>
+    python -m benchmarks.rerun_benchmark --app-dir /tmp/tarot_before/tarot_app_streamlit
+
+Readings go to a prediction service with the mock OpenAI server (TAROT_BACKEND_URL), so the
+measured CPU is the pages' own work. CPU time is read from /proc (Linux).
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+# Keep benchmark calls out of the app's caches & logs
+os.environ.setdefault("TAROT_CACHE_DIR", tempfile.mkdtemp(prefix="tarot_benchmark_"))
+
+import pandas as pd  # noqa: E402
+from openai import OpenAI  # noqa: E402
+from streamlit.proto.BackMsg_pb2 import BackMsg  # noqa: E402
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg  # noqa: E402
+from tornado.websocket import websocket_connect  # noqa: E402
+
+from benchmarks.load_benchmark import SAMPLE_QUERIES  # noqa: E402
+from benchmarks.mock_openai_server import MockSettings, start_mock_server  # noqa: E402
+from tarot_ai import llm  # noqa: E402
+from tarot_ai.service import start_service  # noqa: E402
+
+APP_DIR = Path(__file__).resolve().parents[1]
+MAIN_SCRIPT = "👋_Welcome_page.py"
+WIDGETS = ("selectbox", "text_area", "checkbox", "button")
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+# User + system CPU seconds of a process
+def process_cpu_seconds(pid):
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def start_app(app_dir, backend_url):
+    port = _free_port()
+    env = {**os.environ, "TAROT_BACKEND_URL": backend_url}
+    process = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", MAIN_SCRIPT, "--server.headless", "true",
+         "--server.port", str(port), "--server.fileWatcherType", "none",
+         "--server.enableXsrfProtection", "false", "--browser.gatherUsageStats", "false"],
+        cwd=app_dir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    for _ in range(100):
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1):
+                return process, port
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("the app didn't start")
+
+
+# One browser tab: widgets seen so far & their values, pending values of forms
+class BrowserSession:
+    def __init__(self, connection, page):
+        self.connection = connection
+        self.page = page
+        self.page_script_hash = ""
+        self.widgets = {}  # label -> (kind, proto, fragment_id)
+        self.values = {}  # widget id -> WidgetState
+        self.pending = {}  # form id -> {widget id: WidgetState}
+        self.runs = {"full": 0, "fragment": 0}
+
+    async def rerun(self, trigger=None, fragment_id=""):
+        message = BackMsg()
+        state = message.rerun_script
+        state.page_name = self.page
+        state.page_script_hash = self.page_script_hash
+        state.fragment_id = fragment_id
+        for value in self.values.values():
+            state.widget_states.widgets.append(value)
+        if trigger is not None:
+            state.widget_states.widgets.add(id=trigger, trigger_value=True)
+        await self.connection.write_message(message.SerializeToString(), binary=True)
+        await self._read_run()
+
+    async def _read_run(self):
+        while True:
+            data = await self.connection.read_message()
+            if data is None:
+                raise RuntimeError("the app closed the connection")
+            message = ForwardMsg()
+            message.ParseFromString(data)
+            kind = message.WhichOneof("type")
+            if kind == "new_session":
+                self.page_script_hash = message.new_session.page_script_hash
+            elif kind == "delta" and message.delta.WhichOneof("type") == "new_element":
+                element = message.delta.new_element
+                widget = element.WhichOneof("type")
+                if widget in WIDGETS:
+                    proto = getattr(element, widget)
+                    self.widgets[proto.label] = (widget, proto, message.delta.fragment_id)
+            elif kind == "script_finished":
+                status = message.script_finished
+                if status == ForwardMsg.FINISHED_SUCCESSFULLY:
+                    self.runs["full"] += 1
+                elif status == ForwardMsg.FINISHED_FRAGMENT_RUN_SUCCESSFULLY:
+                    self.runs["fragment"] += 1
+                if status != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    return
+
+    # A value change: rerun now, unless the widget is in a form (then it waits for the submit)
+    async def set_value(self, label, **value):
+        _, proto, fragment_id = self.widgets[label]
+        state = BackMsg().rerun_script.widget_states.widgets.add(id=proto.id, **value)
+        if proto.form_id:
+            self.pending.setdefault(proto.form_id, {})[proto.id] = state
+            return
+        self.values[proto.id] = state
+        await self.rerun(fragment_id=fragment_id)
+
+    async def click(self, label):
+        _, proto, fragment_id = self.widgets[label]
+        if proto.is_form_submitter:
+            self.values.update(self.pending.pop(proto.form_id, {}))
+        await self.rerun(trigger=proto.id, fragment_id=fragment_id)
+
+
+# Open the page, pick a topic, write the story & question (with some edits), get 2 readings
+async def play_session(port, page, i, edits):
+    topic, story, question = SAMPLE_QUERIES[i % len(SAMPLE_QUERIES)]
+    connection = await websocket_connect(f"ws://127.0.0.1:{port}/_stcore/stream")
+    session = BrowserSession(connection, page)
+    try:
+        await session.rerun()
+        _, topics, _ = session.widgets["Select a topic"]
+        await session.set_value("Select a topic", int_value=list(topics.options).index(topic))
+        # A text area sends its value when it loses focus: one change per edit
+        words = story.split()
+        for edit in range(1, edits + 1):
+            await session.set_value("Your story:", string_value=" ".join(words[:len(words) * edit // edits]))
+        await session.set_value("Your question:", string_value=question)
+        await session.click("✨ Get Prediction")
+        await session.set_value("Your question:", string_value=question.replace("?", " soon?"))
+        await session.click("✨ Get Prediction")
+    finally:
+        connection.close()
+    return session.runs
+
+
+def run_sessions(port, pid, page, sessions, edits):
+    results = []
+    for i in range(sessions):
+        cpu_start, start = process_cpu_seconds(pid), time.perf_counter()
+        runs = asyncio.run(play_session(port, page, i, edits))
+        results.append({**runs, "cpu_s": process_cpu_seconds(pid) - cpu_start,
+                        "wall_s": time.perf_counter() - start})
+    return pd.DataFrame(results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Script reruns & server CPU per session of a bot page")
+    parser.add_argument("--app-dir", type=Path, default=APP_DIR, help="tarot_app_streamlit of the version to test")
+    parser.add_argument("--page", default="Keyword-based_Bot", help="URL path of the page")
+    parser.add_argument("--sessions", type=int, default=5)
+    parser.add_argument("--edits", type=int, default=3, help="times the story is edited before the first reading")
+    args = parser.parse_args()
+
+    mock = start_mock_server(MockSettings(latency="fixed", latency_ms=50, token_ms=1, completion_tokens=250))
+    llm.set_client(OpenAI(api_key="benchmark", base_url=mock.base_url, max_retries=0))
+    service = start_service()
+
+    process, port = start_app(args.app_dir, service.base_url)
+    try:
+        # Warm-up session: imports & cached resources of the server process
+        run_sessions(port, process.pid, args.page, 1, args.edits)
+        results = run_sessions(port, process.pid, args.page, args.sessions, args.edits)
+    finally:
+        process.terminate()
+        process.wait()
+
+    print(results.round(3).to_string())
+    print()
+    print(f"{args.app_dir} / {args.page}: {results['full'].mean():.1f} full runs + "
+          f"{results['fragment'].mean():.1f} fragment runs, {results['cpu_s'].mean():.3f} s CPU per session")
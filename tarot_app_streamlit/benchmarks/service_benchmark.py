@@ -0,0 +1,104 @@
+"""
+Prediction service benchmark: starts the mock OpenAI server & the prediction service
+in-process and sends bursts of readings over HTTP, like the pages (or a Telegram bot) would.
+
+    python -m benchmarks.service_benchmark --workers 4 --queue 4 --concurrency 4 16 --requests 32
+
+Reports status codes (429 = backpressure), latency and time to the first streamed token.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+# Keep benchmark calls out of the app's caches & logs
+os.environ.setdefault("TAROT_CACHE_DIR", tempfile.mkdtemp(prefix="tarot_benchmark_"))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+from openai import OpenAI  # noqa: E402
+
+from benchmarks.load_benchmark import SAMPLE_QUERIES, add_scheduler_arguments, scheduler_from_args  # noqa: E402
+from benchmarks.mock_openai_server import add_settings_arguments, settings_from_args, start_mock_server  # noqa: E402
+from tarot_ai import llm  # noqa: E402
+from tarot_ai.scheduler import get_scheduler, set_scheduler  # noqa: E402
+from tarot_ai.service import BOTS, start_service  # noqa: E402
+
+
+# One reading over HTTP -> (status, seconds, seconds to the first token or None)
+def request_reading(base_url, bot, i, stream):
+    topic, story, question = SAMPLE_QUERIES[i % len(SAMPLE_QUERIES)]
+    payload = {"bot": bot, "topic": topic, "story": story, "question": question, "stream": stream,
+               "session": f"client-{i}"}
+    request = urllib.request.Request(f"{base_url}/v1/predictions", data=json.dumps(payload).encode('utf-8'),
+                                     headers={"Content-Type": "application/json"}, method="POST")
+    start = time.perf_counter()
+    first_token = None
+    try:
+        with urllib.request.urlopen(request, timeout=300) as response:
+            if not stream:
+                response.read()
+            for line in response if stream else []:
+                event = json.loads(line)
+                if event["event"] == "token" and first_token is None:
+                    first_token = time.perf_counter() - start
+            return response.status, time.perf_counter() - start, first_token
+    except urllib.error.HTTPError as error:
+        return error.code, time.perf_counter() - start, None
+
+
+def run_burst(base_url, bot, concurrency, requests, stream):
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(lambda i: request_reading(base_url, bot, i, stream), range(requests)))
+
+    statuses = pd.Series([status for status, _, _ in results])
+    latencies = np.array([seconds for status, seconds, _ in results if status == 200])
+    first_tokens = np.array([ttft for status, _, ttft in results if status == 200 and ttft is not None])
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "ok": int((statuses == 200).sum()),
+        "rejected_429": int((statuses == 429).sum()),
+        "errors": int((~statuses.isin([200, 429])).sum()),
+        "p50_s": round(float(np.percentile(latencies, 50)), 3) if len(latencies) else None,
+        "p95_s": round(float(np.percentile(latencies, 95)), 3) if len(latencies) else None,
+        "p50_ttft_s": round(float(np.percentile(first_tokens, 50)), 3) if len(first_tokens) else None,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark of the Tarot AI prediction service")
+    parser.add_argument("--bot", choices=list(BOTS), default="keyword_based")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--queue", type=int, default=4)
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=32, help="readings per concurrency level")
+    parser.add_argument("--no-stream", action="store_true", help="ask for the whole prediction at once")
+    parser.add_argument("--service-url", help="use an already running service instead of starting one")
+    add_settings_arguments(parser)
+    add_scheduler_arguments(parser)
+    args = parser.parse_args()
+
+    base_url = args.service_url
+    if base_url is None:
+        mock = start_mock_server(settings_from_args(args))
+        llm.set_client(OpenAI(api_key="benchmark", base_url=mock.base_url, max_retries=0))
+        llm.CACHE_ENABLED = False
+        set_scheduler(scheduler_from_args(args))
+        service = start_service(workers=args.workers, queue_size=args.queue)
+        base_url = service.base_url
+
+    results = []
+    for concurrency in args.concurrency:
+        result = run_burst(base_url, args.bot, concurrency, args.requests, not args.no_stream)
+        results.append(result)
+        print(f"x{concurrency:<3} {result['ok']} ok, {result['rejected_429']} rejected, p95 {result['p95_s']} s")
+    print()
+    print(pd.DataFrame(results).to_string(index=False))
+    if args.service_url is None:
+        print("Service:", service.stats())
+        print("Scheduler:", get_scheduler().stats())
@@ -0,0 +1,128 @@
+"""
+A/B benchmark of the single-call mode against the chain of GPT calls: both modes read
+the same queries & cards, against the local mock OpenAI server or a real endpoint.
+
+    python -m benchmarks.single_call_benchmark --readings 16
+    python -m benchmarks.single_call_benchmark --base-url https://api.openai.com/v1 --api-key sk-... --readings 8
+
+Reports per bot & mode: latency, GPT calls, tokens & cost per reading and a local rubric score.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Keep benchmark calls out of the app's caches & logs
+os.environ.setdefault("TAROT_CACHE_DIR", tempfile.mkdtemp(prefix="tarot_benchmark_"))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+from openai import OpenAI  # noqa: E402
+
+from benchmarks.load_benchmark import BOTS, SAMPLE_QUERIES, add_scheduler_arguments, scheduler_from_args  # noqa: E402
+from benchmarks.mock_openai_server import add_settings_arguments, settings_from_args, start_mock_server  # noqa: E402
+from tarot_ai import llm  # noqa: E402
+from tarot_ai.knowledge_base import load_knowledge_base  # noqa: E402
+from tarot_ai.metrics import load_call_log  # noqa: E402
+from tarot_ai.retrieval import tokenize  # noqa: E402
+from tarot_ai.scheduler import set_scheduler  # noqa: E402
+
+MODES = {"chain": False, "single_call": True}
+
+MIN_WORDS = 150  # shorter or longer predictions lose the length point of the rubric
+MAX_WORDS = 700
+
+
+# Same queries & cards for both modes (paired comparison)
+def make_inputs(readings, seed=0):
+    rng = random.Random(seed)
+    cards = sorted(load_knowledge_base().cards)
+    inputs = []
+    for i in range(readings):
+        topic, story, question = SAMPLE_QUERIES[i % len(SAMPLE_QUERIES)]
+        drawn = rng.sample(cards, 3)
+        inputs.append({"topic": topic, "story": story, "question": question,
+                       "card_1": drawn[0], "card_2": drawn[1], "card_3": drawn[2]})
+    return inputs
+
+
+# Local rubric (0..1): structure of the final layout, words of the query used, length
+def rubric_score(prediction, user_input):
+    headers = [f"**Card №{number}: {user_input[f'card_{number}']}**" for number in (1, 2, 3)]
+    positions = [prediction.find(header) for header in headers]
+    in_order = -1 not in positions and positions == sorted(positions)
+    beginning = in_order and bool(prediction[:positions[0]].strip())
+    conclusion = in_order and bool(prediction[positions[2]:].strip().count("\n\n"))
+    structure = (sum(position != -1 for position in positions) + in_order + beginning + conclusion) / 6
+
+    query_terms = set(tokenize(f"{user_input['story']} {user_input['question']}"))
+    coverage = len(query_terms & set(tokenize(prediction))) / len(query_terms) if query_terms else 1.0
+
+    length = MIN_WORDS <= len(prediction.split()) <= MAX_WORDS
+    return round((structure + coverage + length) / 3, 3)
+
+
+def run_mode(generate, inputs, single_call, concurrency):
+    def one_reading(user_input):
+        start = time.perf_counter()
+        prediction = generate(user_input, single_call=single_call)
+        return time.perf_counter() - start, prediction
+
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(one_reading, inputs))
+    calls = load_call_log()
+    calls = calls[calls["time"] >= start] if not calls.empty else calls
+
+    latencies = np.array([seconds for seconds, _ in results])
+    readings = [(prediction, user_input) for (_, prediction), user_input in zip(results, inputs)
+                if "cannot make a prediction" not in prediction]
+    return {
+        "readings": len(inputs),
+        "rejected": len(inputs) - len(readings),
+        "p50_s": round(float(np.percentile(latencies, 50)), 3),
+        "p95_s": round(float(np.percentile(latencies, 95)), 3),
+        "calls_per_reading": round(len(calls) / len(inputs), 2),
+        "prompt_tokens": round(calls["prompt_tokens"].sum() / len(inputs), 1) if len(calls) else 0.0,
+        "completion_tokens": round(calls["completion_tokens"].sum() / len(inputs), 1) if len(calls) else 0.0,
+        "cost_usd": round(calls["cost_usd"].sum() / len(inputs), 6) if len(calls) else 0.0,
+        "rubric": round(float(np.mean([rubric_score(p, u) for p, u in readings])), 3) if readings else None,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="A/B benchmark: single-call mode vs. the chain of GPT calls")
+    parser.add_argument("--bots", nargs="+", choices=list(BOTS), default=list(BOTS))
+    parser.add_argument("--readings", type=int, default=16, help="readings per bot & mode")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0, help="seed of the drawn cards")
+    parser.add_argument("--base-url", help="use another endpoint (e.g. the real API) instead of the mock server")
+    parser.add_argument("--api-key", default=os.environ.get("OPENAI_API_KEY", "benchmark"))
+    parser.add_argument("--output", help="save the results as CSV")
+    add_scheduler_arguments(parser)
+    add_settings_arguments(parser)
+    args = parser.parse_args()
+
+    base_url = args.base_url
+    if base_url is None:
+        base_url = start_mock_server(settings_from_args(args)).base_url
+    llm.set_client(OpenAI(api_key=args.api_key, base_url=base_url, max_retries=0))
+    llm.CACHE_ENABLED = False
+    set_scheduler(scheduler_from_args(args))
+
+    inputs = make_inputs(args.readings, args.seed)
+    results = []
+    for bot in args.bots:
+        for mode, single_call in MODES.items():
+            result = run_mode(BOTS[bot], inputs, single_call, args.concurrency)
+            results.append({"bot": bot, "mode": mode, **result})
+            print(f"{bot:>20} {mode:>11}  p50 {result['p50_s']} s  {result['calls_per_reading']} calls  "
+                  f"{result['prompt_tokens']} prompt tokens  rubric {result['rubric']}")
+
+    results = pd.DataFrame(results)
+    print()
+    print(results.to_string(index=False))
+    if args.output:
+        results.to_csv(args.output, index=False)
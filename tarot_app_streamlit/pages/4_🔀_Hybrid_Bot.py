@@ -0,0 +1,147 @@
+import streamlit as st
+import random
+from tarot_ai.bots.hybrid import BOT
+from tarot_ai.knowledge_base import get_knowledge_base
+from tarot_ai.prefetch import ENABLED as PREFETCH, prefetch_for_topic, take_prefetch
+from tarot_ai.service_client import generate_prediction
+from tarot_ai.timeline import StageTimeline
+from tarot_ai.ui import show_timeline, write_prediction
+
+st.set_page_config(
+    page_title=BOT,
+    page_icon="🔮",
+)
+
+# Get a list of all tarot cards (loaded once per server process)
+kb = get_knowledge_base()
+list_tarot = list(kb.cards)
+
+# Function to draw random Tarot cards
+def draw_tarot_cards(list_tarot, num_cards=3):
+    drawn_cards = random.sample(list_tarot, num_cards)
+    return drawn_cards
+
+# Streamlit application
+st.title("🔀 Hybrid Bot")
+
+# Initialize session state for storing user input & prediction
+if "last_input" not in st.session_state:
+    st.session_state.last_input = None  # previous input
+if "last_prediction" not in st.session_state:
+    st.session_state.last_prediction = None  # previous prediction
+if "drawn_cards" not in st.session_state:
+    st.session_state.drawn_cards = None  # drawn cards
+
+st.divider()
+st.subheader("✍️ Description")
+st.markdown('''
+This is the fourth version of a tarot card prediction bot, combining the keywords & summaries of the previous versions with the parsed tarot interpretations themselves 
+
+For every drawn card, only the passages of the interpretations that best match your story & question are added to the prompt (ranked locally with TF-IDF)
+            
+**Techniques used**: 
+- meta-prompting
+- prompt-chaining 
+- key-words extraction
+- summary generation
+- relevance-ranked retrieval
+            
+**Version**: Hybrid (Keyword & Summarization) 
+''')
+
+st.divider()
+
+st.subheader("🧙 Prediction")
+
+
+# Only this part of the page reruns on submit; editing the form doesn't rerun anything
+@st.fragment
+def prediction_section():
+    if PREFETCH:
+        # Step 1: Select a topic (outside the form: a new topic draws the cards right away)
+        topic = st.selectbox("Select a topic", ["Career", "Finances", "Love", "Other"])
+        # Step 2: Provide a story (outside the form too: editing it after a reading starts the next prefetch)
+        story = st.text_area('Your story:', placeholder="Tell us more about your situation here")
+        prefetch_for_topic(topic, story, list_tarot)
+
+    with st.form("query", border=False):
+        if not PREFETCH:
+            # Step 1: Select a topic
+            topic = st.selectbox("Select a topic", ["Career", "Finances", "Love", "Other"])
+
+            # Step 2: Provide a story
+            story = st.text_area('Your story:', placeholder="Tell us more about your situation here")
+
+        # Step 3: Ask a question
+        question = st.text_area('Your question:',placeholder="Ask your main question here")
+
+        st.text("")
+
+        # Prediction button
+        submitted = st.form_submit_button("✨ Get Prediction")
+
+    if submitted:
+        # Gather input data
+        current_input_no_cards = {
+            "topic": topic,
+            "story": story,
+            "question": question
+        }
+
+        # First card draw case:
+        if "last_input_no_cards" not in st.session_state:
+            st.session_state.last_input_no_cards = current_input_no_cards
+            prefetched = take_prefetch(topic) if PREFETCH else None
+            st.session_state.drawn_cards = prefetched.cards if prefetched else draw_tarot_cards(list_tarot)
+
+            full_input_for_prediction = {
+                **current_input_no_cards,
+                "card_1": st.session_state.drawn_cards[0],
+                "card_2": st.session_state.drawn_cards[1],
+                "card_3": st.session_state.drawn_cards[2]
+            }
+
+            timeline = StageTimeline()
+            with st.status("Generating your prediction...") as status:
+                prediction = generate_prediction(BOT, full_input_for_prediction,
+                                                 timeline=timeline,
+                                                 stream=True,
+                                                 progress=status.write)
+                status.update(label="The cards are drawn", state="complete", expanded=False)
+
+            st.session_state.last_prediction = write_prediction(prediction)
+            show_timeline(timeline)
+
+        else:
+
+            # 2nd ... N-th attempts to draw a card with different input:
+            if current_input_no_cards != st.session_state.last_input_no_cards:
+                st.session_state.last_input_no_cards = current_input_no_cards
+                prefetched = take_prefetch(topic) if PREFETCH else None
+                st.session_state.drawn_cards = prefetched.cards if prefetched else draw_tarot_cards(list_tarot)
+
+                full_input_for_prediction = {
+                    **current_input_no_cards,
+                    "card_1": st.session_state.drawn_cards[0],
+                    "card_2": st.session_state.drawn_cards[1],
+                    "card_3": st.session_state.drawn_cards[2]
+                }
+
+                timeline = StageTimeline()
+                with st.status("Generating your prediction...") as status:
+                    prediction = generate_prediction(BOT, full_input_for_prediction,
+                                                     timeline=timeline,
+                                                     stream=True,
+                                                     progress=status.write)
+                    status.update(label="The cards are drawn", state="complete", expanded=False)
+
+                st.session_state.last_prediction = write_prediction(prediction)
+                show_timeline(timeline)
+            else:
+
+                # 2nd ... N-th attempts to draw a card with the same input:
+                st.chat_message("assistant").write("Please update the topic, story, or question.")
+                st.chat_message("assistant").write(st.session_state.last_prediction)
+
+
+prediction_section()
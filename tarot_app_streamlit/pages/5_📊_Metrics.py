@@ -0,0 +1,73 @@
+import streamlit as st
+from tarot_ai.knowledge_base import get_knowledge_base
+from tarot_ai.metrics import get_metrics, load_call_log, summarize_calls
+from tarot_ai.prefetch import get_prefetch_stats
+from tarot_ai.query_screener import get_query_screener
+from tarot_ai.response_cache import get_response_cache
+from tarot_ai.routing import summarize_routes
+from tarot_ai.scheduler import get_scheduler
+from tarot_ai.semantic_cache import get_semantic_cache
+from tarot_ai.singleflight import get_singleflight
+from tarot_ai.structure import get_structure_checker
+
+st.set_page_config(
+    page_title="metrics",
+    page_icon="🔮",
+)
+
+st.title("📊 Metrics")
+
+st.divider()
+st.subheader("⏱️ GPT calls per stage")
+
+calls = load_call_log()
+
+if calls.empty:
+    st.info("No GPT calls logged yet")
+else:
+    bots = sorted(calls["bot"].unique())
+    selected_bots = st.multiselect("Bots", bots, default=bots)
+    calls = calls[calls["bot"].isin(selected_bots)]
+
+    col_1, col_2, col_3, col_4, col_5 = st.columns(5)
+    col_1.metric("Calls", len(calls))
+    col_2.metric("Cache hits", int(calls["cache_hit"].sum()))
+    col_3.metric("Coalesced", int(calls["coalesced"].fillna(False).sum()) if "coalesced" in calls else 0)
+    col_4.metric("Cached prompt tokens",
+                 f"{calls['cached_tokens'].sum() / max(calls['prompt_tokens'].sum(), 1):.0%}")
+    col_5.metric("Estimated cost", f"${calls['cost_usd'].sum():.3f}")
+
+    st.dataframe(summarize_calls(calls), hide_index=True)
+
+    st.markdown("**🧭 Model routing** – cost & latency vs. sending every call to the large model")
+    routes = summarize_routes(calls)
+    if not routes.empty:
+        col_1, col_2 = st.columns(2)
+        col_1.metric("Routed cost", f"${routes['cost_usd'].sum():.3f}",
+                     delta=f"-${routes['savings_usd'].sum():.3f}", delta_color="inverse")
+        col_2.metric("Large-model cost", f"${routes['baseline_cost_usd'].sum():.3f}")
+        st.dataframe(routes, hide_index=True)
+
+st.divider()
+st.subheader("🚦 Scheduler")
+
+scheduler_stats = get_scheduler().stats()
+col_1, col_2, col_3 = st.columns(3)
+col_1.metric("Queue depth", scheduler_stats["queue_depth"])
+col_2.metric("Calls in flight", scheduler_stats["running"])
+col_3.metric("Mean wait", f"{scheduler_stats['mean_wait_s']:.2f} s")
+st.write(scheduler_stats)
+st.write("**Coalesced identical calls**", get_singleflight().stats())
+
+st.divider()
+st.subheader("🗄️ Caches & data")
+
+st.write("**Response cache**", get_response_cache().stats())
+st.write("**Semantic cache of readings**", get_semantic_cache().stats())
+st.write("**Query screener**", get_query_screener().stats())
+st.write("**Final layout check** (drafts shown without the final GPT call)", get_structure_checker().stats())
+st.write("**Prefetch** (cards & card-only stages started when the topic or story is edited; GPT calls capped per hour)", get_prefetch_stats().stats())
+st.write("**Knowledge base**", get_knowledge_base().stats())
+
+with st.expander("Prometheus metrics (this server process)"):
+    st.code(get_metrics().prometheus_text(), language="text")
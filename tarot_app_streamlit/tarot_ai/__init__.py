@@ -0,0 +1 @@
+# Shared back-end code for the Tarot AI bots (data, LLM calls, pipelines)
@@ -0,0 +1 @@
+# generate_prediction pipelines of the bots (used by the pages & benchmarks)
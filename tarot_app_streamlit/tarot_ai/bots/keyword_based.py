@@ -0,0 +1,97 @@
+# Keyword-based Bot: predictions built on card keywords (3 GPT calls)
+from tarot_ai import single_call as single_call_mode
+from tarot_ai.knowledge_base import get_knowledge_base
+from tarot_ai.llm import get_model_response, stream_model_response
+from tarot_ai.prompts import (FINAL_PREDICTION, KEYWORD_PREDICTION, VALIDATION, build_messages,
+                              format_user_input)
+from tarot_ai.query_screener import validate_query
+from tarot_ai.routing import draft_is_final
+from tarot_ai.structure import get_structure_checker
+from tarot_ai.timeline import StageTimeline
+
+BOT = "keyword_based"
+
+
+# Generate predictions 
+def generate_prediction(user_input, timeline=None, stream=False, progress=None, single_call=None):
+
+    if timeline is None:
+        timeline = StageTimeline()
+    if progress is None:
+        progress = lambda step: None
+    if single_call is None:
+        single_call = single_call_mode.ENABLED
+
+    kb = get_knowledge_base()
+
+    # Filter keywords for the selected cards and topic
+    card_keywords = kb.get_card_keywords([user_input['card_1'], user_input['card_2'], user_input['card_3']], 
+                                             user_input['topic'])
+
+    # Data of the second stage: create interpretations, based on key-words (also used in single-call mode)
+    keyword_data = f"""
+    Tarot cards input data:
+    Name – Card 1: {user_input['card_1']}
+    Keywords – Card 1: {', '.join(card_keywords[user_input['card_1']])}
+
+    Name - Card 2: {user_input['card_2']}
+    Keywords – Card 2: {', '.join(card_keywords[user_input['card_2']])}
+
+    Name – Card 3: {user_input['card_3']}
+    Keywords – Card 3: {', '.join(card_keywords[user_input['card_3']])}
+
+    Prediction theme: {user_input['topic']}
+
+    User's input data:
+    - Story: {user_input['story']}
+    - Question: {user_input['question']}
+    """
+
+    if single_call:
+        # Refused or malformed structured answer -> the chain of calls
+        def fallback():
+            return generate_prediction(user_input, timeline=timeline, stream=stream,
+                                       progress=progress, single_call=False)
+
+        return single_call_mode.generate_single_call(BOT, user_input, keyword_data, timeline=timeline,
+                                                     progress=progress, fallback=fallback)
+
+    # Instructions of all stages are in the shared prompt prefix (tarot_ai.prompts),
+    # each stage only sends its data
+
+    progress("🔍 Checking your query")
+    with timeline.stage("validation"):
+        validation_response = validate_query(
+            user_input, build_messages(VALIDATION, format_user_input(user_input, cards=False)), bot=BOT)
+
+    if "cannot make a prediction" in validation_response:
+        return validation_response
+
+    progress("🪄 Interpreting the cards with your story")
+    with timeline.stage("preliminary"):
+        preliminary_prediction = get_model_response(build_messages(KEYWORD_PREDICTION, keyword_data),
+                                                    stage="preliminary", bot=BOT)
+
+    # A draft of the final-stage model may already have the final layout (after small local fixes)
+    # -> no final call
+    if draft_is_final(BOT):
+        prediction = get_structure_checker().finalize(preliminary_prediction, user_input)
+        if prediction is not None:
+            return prediction
+
+    # Third stage: refining structure
+    final_messages = build_messages(FINAL_PREDICTION, f"""
+    Preliminary prediction:
+    {preliminary_prediction}
+
+    {format_user_input(user_input)}
+    """)
+
+    progress("✨ Writing your prediction")
+    if stream:
+        return stream_model_response(final_messages, stage="final", timeline=timeline, bot=BOT)
+
+    with timeline.stage("final"):
+        final_prediction = get_model_response(final_messages, stage="final", bot=BOT)
+
+    return final_prediction
@@ -0,0 +1,138 @@
+# Prompt-based Bot: meta-prompting & prompt-chaining (4 GPT calls)
+import contextvars
+
+from tarot_ai import single_call as single_call_mode
+from tarot_ai.interpretation_store import assemble_card_interpretation
+from tarot_ai.llm import get_executor, get_model_response, stream_model_response
+from tarot_ai.prefetch import record_unused
+from tarot_ai.prompts import (FINAL_PREDICTION, INTERPRETATION, LINKING, VALIDATION, build_messages,
+                              format_user_input)
+from tarot_ai.query_screener import validate_query
+from tarot_ai.routing import draft_is_final
+from tarot_ai.structure import get_structure_checker
+from tarot_ai.timeline import StageTimeline
+
+BOT = "prompt_based"
+
+
+# Second stage: Tarot card interpretation (only depends on the topic & cards, so pages can prefetch it)
+def interpret_cards(topic, cards):
+    # Pre-generated interpretations (if available) save one GPT call
+    card_interpretation = assemble_card_interpretation(cards, topic)
+
+    if card_interpretation is None:
+        card_interpretation = get_model_response(build_messages(INTERPRETATION, f"""
+    Prediction theme: {topic}
+
+    Card 1: {cards[0]}
+    Card 2: {cards[1]}
+    Card 3: {cards[2]}
+    """), stage="interpretation", bot=BOT)
+    return card_interpretation
+
+
+# Generate predictions (prefetched_interpretation: Future of interpret_cards for the same topic & cards)
+def generate_prediction(user_input, concurrent=True, timeline=None, stream=False, progress=None,
+                        single_call=None, prefetched_interpretation=None):
+
+    if timeline is None:
+        timeline = StageTimeline()
+    if progress is None:
+        progress = lambda step: None
+    if single_call is None:
+        single_call = single_call_mode.ENABLED
+
+    # Instructions of all stages are in the shared prompt prefix (tarot_ai.prompts),
+    # each stage only sends its data
+
+    if single_call:
+        # Prefetched or pre-generated interpretations (if available) as material about the cards
+        if prefetched_interpretation is not None:
+            card_interpretation = prefetched_interpretation.result()
+        else:
+            card_interpretation = assemble_card_interpretation(
+                [user_input['card_1'], user_input['card_2'], user_input['card_3']], user_input['topic'])
+        card_data = f"Cards interpretations:\n{card_interpretation}" if card_interpretation else ""
+
+        # Refused or malformed structured answer -> the chain of calls
+        def fallback():
+            return generate_prediction(user_input, concurrent=concurrent, timeline=timeline, stream=stream,
+                                       progress=progress, single_call=False,
+                                       prefetched_interpretation=prefetched_interpretation)
+
+        return single_call_mode.generate_single_call(BOT, user_input, card_data, timeline=timeline,
+                                                     progress=progress, fallback=fallback)
+
+    def run_validation():
+        with timeline.stage("validation"):
+            return validate_query(
+                user_input, build_messages(VALIDATION, format_user_input(user_input, cards=False)), bot=BOT)
+
+    def run_interpretation():
+        with timeline.stage("interpretation"):
+            if prefetched_interpretation is not None:
+                return prefetched_interpretation.result()
+            return interpret_cards(user_input['topic'],
+                                   [user_input['card_1'], user_input['card_2'], user_input['card_3']])
+
+    progress("🔍 Checking your query & interpreting the cards")
+    if concurrent:
+        # Card interpretation doesn't depend on validation -> start it speculatively
+        # (in this reading's context, so the scheduler sees the same session)
+        interpretation_future = get_executor().submit(contextvars.copy_context().run, run_interpretation)
+        validation_response = run_validation()
+
+        if "cannot make a prediction" in validation_response:
+            # Rejected query: drop the speculative work (cancelled if not started yet)
+            interpretation_future.cancel()
+            if prefetched_interpretation is not None:
+                record_unused("query rejected", called=not prefetched_interpretation.cancel())
+            return validation_response
+
+        card_interpretation = interpretation_future.result()
+    else:
+        validation_response = run_validation()
+
+        if "cannot make a prediction" in validation_response:
+            if prefetched_interpretation is not None:
+                record_unused("query rejected", called=not prefetched_interpretation.cancel())
+            return validation_response
+
+        card_interpretation = run_interpretation()
+
+    # Third stage: connect interpretations & user's query
+    linking_data = f"""
+    Cards interpretations:
+    {card_interpretation}
+
+    {format_user_input(user_input)}
+    """
+
+    progress("🪄 Linking the cards with your story")
+    with timeline.stage("preliminary"):
+        preliminary_prediction = get_model_response(build_messages(LINKING, linking_data),
+                                                    stage="preliminary", bot=BOT)
+
+    # A draft of the final-stage model may already have the final layout (after small local fixes)
+    # -> no final call
+    if draft_is_final(BOT):
+        prediction = get_structure_checker().finalize(preliminary_prediction, user_input)
+        if prediction is not None:
+            return prediction
+
+    # Fourth stage: refining structure
+    final_messages = build_messages(FINAL_PREDICTION, f"""
+    Preliminary prediction:
+    {preliminary_prediction}
+
+    {format_user_input(user_input)}
+    """)
+
+    progress("✨ Writing your prediction")
+    if stream:
+        return stream_model_response(final_messages, stage="final", timeline=timeline, bot=BOT)
+
+    with timeline.stage("final"):
+        final_prediction = get_model_response(final_messages, stage="final", bot=BOT)
+
+    return final_prediction
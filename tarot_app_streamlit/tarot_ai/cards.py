@@ -0,0 +1,84 @@
+import logging
+import re
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+MAJOR_ARCANA = (
+    "Fool", "Magician", "High Priestess", "Empress", "Emperor", "Hierophant", "Lovers",
+    "Chariot", "Strength", "Hermit", "Wheel of Fortune", "Justice", "Hanged Man", "Death",
+    "Temperance", "Devil", "Tower", "Star", "Moon", "Sun", "Judgement", "World",
+)
+SUITS = ("Wands", "Cups", "Swords", "Pentacles")
+RANKS = ("Ace", "Two", "Three", "Four", "Five", "Six", "Seven", "Eight", "Nine", "Ten",
+         "Page", "Knight", "Queen", "King")
+
+# Canonical 78-card registry: the position of a card is its stable integer ID
+CARDS = MAJOR_ARCANA + tuple(f"{rank} of {suit}" for suit in SUITS for rank in RANKS)
+CARD_IDS = {card: card_id for card_id, card in enumerate(CARDS)}
+
+# Other spellings used by tarot websites & datasets
+RANK_ALIASES = {
+    "1": "Ace", "one": "Ace", "2": "Two", "3": "Three", "4": "Four", "5": "Five", "6": "Six",
+    "7": "Seven", "8": "Eight", "9": "Nine", "10": "Ten", "princess": "Page", "prince": "Knight",
+}
+SUIT_ALIASES = {
+    "wand": "Wands", "rods": "Wands", "staves": "Wands", "batons": "Wands",
+    "cup": "Cups", "chalices": "Cups",
+    "sword": "Swords",
+    "pentacle": "Pentacles", "coins": "Pentacles", "disks": "Pentacles", "discs": "Pentacles",
+}
+CARD_ALIASES = {
+    "judgment": "Judgement",
+    "wheel": "Wheel of Fortune",
+    "pope": "Hierophant",
+    "priestess": "High Priestess",
+    "hanged one": "Hanged Man",
+    "universe": "World",
+}
+
+
+def _key(name):
+    key = re.sub(r"[^\w\s]", " ", name.lower())
+    key = re.sub(r"\btarot( card)?\b|\bmeanings?\b|\bupright\b", " ", key)
+    key = re.sub(r"\s+", " ", key).strip()
+    return re.sub(r"^the ", "", key)
+
+
+_LOOKUP = {_key(card): card for card in CARDS}
+_LOOKUP.update({_key(alias): card for alias, card in CARD_ALIASES.items()})
+
+
+# Canonical card name for any spelling ("The Fool", "2 of cups", "Knight of Coins"), None if unknown
+@lru_cache(maxsize=4096)
+def normalize_card(name):
+    if not isinstance(name, str):
+        return None
+    key = _key(name)
+    if key in _LOOKUP:
+        return _LOOKUP[key]
+
+    match = re.fullmatch(r"(\w+) of (?:the )?(\w+)", key)
+    if match:
+        rank = RANK_ALIASES.get(match.group(1), match.group(1).capitalize())
+        suit = SUIT_ALIASES.get(match.group(2), match.group(2).capitalize())
+        card = f"{rank} of {suit}"
+        if card in CARD_IDS:
+            return card
+
+    logger.warning("Unknown tarot card name: %r", name)
+    return None
+
+
+# True if name is a spelling of the card (unlike normalize_card, quiet for any other text)
+def matches_card(name, card):
+    key = _key(name)
+    if key == _key(card) or _LOOKUP.get(key) == card:
+        return True
+    return bool(re.fullmatch(r"\w+ of (?:the )?\w+", key)) and normalize_card(name) == card
+
+
+# Stable integer ID of a card (any spelling), None if unknown
+def card_id(name):
+    card = normalize_card(name)
+    return None if card is None else CARD_IDS[card]
@@ -0,0 +1,178 @@
+"""
+Regenerate keywords_df_tarot.csv & summary_df_tarot.csv from final_df.csv:
+
+    python -m tarot_ai.generate_datasets --samples 5 --workers 8 --rpm 300
+
+For every (card, topic) group, N keyword & N summary samples run concurrently under a
+global requests-per-minute limit. Keywords are aggregated by frequency voting and the
+summary closest to all others is kept (self-consistency). Finished groups are appended
+to a checkpoint, so an interrupted run resumes without paying for them again.
+--base-url points the run to another endpoint (e.g. the local mock server).
+"""
+import argparse
+import json
+import re
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+import pandas as pd
+from openai import OpenAI
+
+from tarot_ai import llm
+from tarot_ai.ingestion.fetcher import HostRateLimiter
+from tarot_ai.knowledge_base import CACHE_DIR, DATA_DIR
+
+CHECKPOINT_PATH = CACHE_DIR / 'datasets_checkpoint.jsonl'
+BOT = "dataset_builder"
+
+SYSTEM_PROMPT = "You are an expert in Tarot card reading."
+
+
+def build_keywords_prompt(card, topic, interpretations):
+    texts = "\n\n".join(f"Interpretation {i}: {text}" for i, text in enumerate(interpretations, start=1))
+    return f"""
+    You will be provided with several interpretations of a Tarot card for one theme.
+
+    **Your task**:
+    Extract 5-8 keywords or short phrases that best describe the meaning of the card for this theme.
+    Respond only with the keywords, separated by commas.
+
+    Card: {card}
+    Theme: {topic}
+
+    {texts}
+    """
+
+
+def build_summary_prompt(card, topic, interpretations):
+    texts = "\n\n".join(f"Interpretation {i}: {text}" for i, text in enumerate(interpretations, start=1))
+    return f"""
+    You will be provided with several interpretations of a Tarot card for one theme.
+
+    **Your task**:
+    Combine them into one general interpretation of 2-3 sentences.
+    Start with "The {card} in a {topic} context".
+
+    {texts}
+    """
+
+
+# Keywords named by more than half of the samples, most frequent first
+def vote_keywords(samples):
+    counts = Counter()
+    first_seen = {}
+    for sample in samples:
+        keywords = {re.sub(r"\s+", " ", k).strip(" .\n").lower() for k in sample.split(",")}
+        for keyword in keywords - {""}:
+            counts[keyword] += 1
+            first_seen.setdefault(keyword, len(first_seen))
+    majority = [k for k, count in counts.items() if count > len(samples) / 2]
+    if not majority:
+        majority = [k for k, _ in counts.most_common(6)]
+    return sorted(majority, key=lambda k: (-counts[k], first_seen[k]))
+
+
+# Summary with the highest average word overlap with the other samples
+def pick_consistent_summary(samples):
+    word_sets = [set(re.findall(r"\w+", sample.lower())) for sample in samples]
+
+    def agreement(i):
+        return sum(
+            len(word_sets[i] & other) / max(len(word_sets[i] | other), 1)
+            for j, other in enumerate(word_sets) if j != i
+        )
+
+    return samples[max(range(len(samples)), key=agreement)].strip()
+
+
+def load_checkpoint(path=CHECKPOINT_PATH):
+    if not path.exists():
+        return {}
+    with open(path, encoding='utf-8') as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    return {(r['card'], r['topic']): r for r in records}
+
+
+def generate_datasets(samples=5, workers=8, rpm=300, data_dir=DATA_DIR, checkpoint_path=CHECKPOINT_PATH):
+    final_df = pd.read_csv(data_dir / 'final_df.csv')
+    groups = {key: group['interpretation'].tolist() for key, group in final_df.groupby(['card', 'topic'])}
+
+    done = load_checkpoint(checkpoint_path)
+    todo = [key for key in groups if key not in done]
+    print(f"{len(done)} groups done, {len(todo)} to generate ({samples} samples each)")
+
+    limiter = HostRateLimiter(rpm / 60)
+    collected = {key: {"keywords": [], "summary": [], "failed": 0} for key in todo}
+    checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+
+    def sample(key, kind):
+        card, topic = key
+        build_prompt = build_keywords_prompt if kind == "keywords" else build_summary_prompt
+        limiter.wait(str(llm.get_client().base_url))
+        return llm.get_model_response([
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": build_prompt(card, topic, groups[key])}
+        ], stage=kind, use_cache=False, bot=BOT)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor, open(checkpoint_path, 'a', encoding='utf-8') as checkpoint:
+        futures = {
+            executor.submit(sample, key, kind): (key, kind)
+            for key in todo for kind in ("keywords", "summary") for _ in range(samples)
+        }
+        try:
+            for future in as_completed(futures):
+                key, kind = futures[future]
+                state = collected[key]
+                try:
+                    state[kind].append(future.result())
+                except Exception as error:
+                    print(f"[WARNING] Sample failed for {key[0]} / {key[1]}: {error}")
+                    state["failed"] += 1
+
+                if len(state["keywords"]) + len(state["summary"]) + state["failed"] < 2 * samples:
+                    continue
+                if state["failed"]:
+                    continue  # retried on the next run
+
+                record = {
+                    "card": key[0],
+                    "topic": key[1],
+                    "keyword": ", ".join(vote_keywords(state["keywords"])),
+                    "summary": pick_consistent_summary(state["summary"]),
+                }
+                checkpoint.write(json.dumps(record, ensure_ascii=False) + "\n")
+                checkpoint.flush()
+                done[key] = record
+                print(f"[{len(done)}/{len(groups)}] {key[0]} / {key[1]}")
+        except KeyboardInterrupt:
+            # Don't pay for queued samples; finished groups are already in the checkpoint
+            executor.shutdown(cancel_futures=True)
+            raise
+
+    if len(done) < len(groups):
+        print(f"[WARNING] {len(groups) - len(done)} groups failed, run again to resume")
+        return None
+
+    records = pd.DataFrame(done.values()).sort_values(by=['topic', 'card'])
+    records[['card', 'topic', 'keyword']].to_csv(data_dir / 'keywords_df_tarot.csv', index=False)
+    records[['card', 'topic', 'summary']].to_csv(data_dir / 'summary_df_tarot.csv', index=False)
+    print(f"Saved {len(records)} keyword & summary rows")
+    return records
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate the keyword & summary datasets")
+    parser.add_argument("--samples", type=int, default=5, help="self-consistency samples per group")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--rpm", type=float, default=300, help="global limit of requests per minute")
+    parser.add_argument("--base-url", help="OpenAI-compatible endpoint, e.g. the local mock server")
+    parser.add_argument("--data-dir", default=str(DATA_DIR), help="folder with final_df.csv & the output CSVs")
+    parser.add_argument("--checkpoint", default=str(CHECKPOINT_PATH))
+    args = parser.parse_args()
+
+    if args.base_url:
+        llm.set_client(OpenAI(api_key="mock", base_url=args.base_url))
+
+    generate_datasets(args.samples, args.workers, args.rpm,
+                      data_dir=Path(args.data_dir), checkpoint_path=Path(args.checkpoint))
@@ -0,0 +1 @@
+# Scraping of tarot card meanings into final_df.csv (replaces the loops of parsing_final.ipynb)
@@ -0,0 +1,75 @@
+# Third website - astrotalk
+import re
+
+from bs4 import BeautifulSoup
+
+MAIN_URL = "https://astrotalk.com/tarot"
+
+TOPICS_PATTERNS = {
+    'general': re.compile(
+        r"(upright.*tarot\s+card\s+meaning)"   # Upright ... Tarot Card meaning
+        r"|(upright.*of\s+\w+\s+meaning)"  # Upright Eight of Wands Meaning
+        r"|(Reversed Five of Cups tarot card meaning)", # mistake from the website
+        re.IGNORECASE
+    ),
+    'love': re.compile(r"love.*\(upright\)", re.IGNORECASE),
+    'finance': re.compile(r"financ.*\(upright\)", re.IGNORECASE),
+    'career': re.compile(r"career.*\(upright\)", re.IGNORECASE),
+}
+
+
+# Find interpretations
+def get_text_until_next_h5(heading_tag):
+    texts = []
+    for element in heading_tag.next_elements:
+        if element is heading_tag:
+            continue
+        if element.name == 'h5':
+            break
+        if element.name == 'p':
+            texts.append(element.get_text(strip=True))
+    return " ".join(texts)
+
+
+# Extract the name of a tarot card
+def extract_card_name(soup):
+    h1_tag = soup.find("h1", class_="main-heading")
+    if h1_tag:
+        return h1_tag.get_text(strip=True)
+    return "Unknown Card"
+
+
+# Rows (source, topic, interpretation, card) of one card page
+def parse_card_page(html, url):
+    soup = BeautifulSoup(html, 'html.parser')
+    card_name = extract_card_name(soup)
+
+    data = []
+    for heading in soup.find_all('h5'):
+        heading_text = heading.get_text(strip=True)
+        matched_topic = next(
+            (topic for topic, pattern in TOPICS_PATTERNS.items() if pattern.search(heading_text)), None
+        )
+
+        if matched_topic:
+            data.append({
+                'source': url,
+                'topic': matched_topic,
+                'interpretation': get_text_until_next_h5(heading),
+                'card': card_name
+            })
+
+    return data
+
+
+# Get all possible links for different tarot cards
+def get_card_links(html, main_url=MAIN_URL):
+    soup = BeautifulSoup(html, 'html.parser')
+    base = main_url.rsplit("/tarot", 1)[0]
+
+    links = set()
+    for a in soup.find_all('a', href=True):
+        href = a['href']
+        if href.startswith("/tarot/") and len(href) > len("/tarot/"):
+            links.add(base + href)
+    return sorted(links)
@@ -0,0 +1,87 @@
+"""
+Rebuild final_df.csv from the three sources:
+
+    python -m tarot_ai.ingestion.build --workers 8 --rate 2
+
+--labyrinthos-url / --astrotalk-url point the scraper to another host (e.g. a local
+server with saved pages), --skip-huggingface keeps the HF rows of the current file,
+--dedup removes near-duplicate interpretations (tarot_ai.ingestion.dedup).
+"""
+import argparse
+
+import pandas as pd
+
+from tarot_ai.cards import normalize_card
+from tarot_ai.ingestion import astrotalk, huggingface, labyrinthos
+from tarot_ai.ingestion.fetcher import Fetcher
+from tarot_ai.knowledge_base import DATA_DIR
+
+FINAL_DF_PATH = DATA_DIR / 'final_df.csv'
+COLUMNS = ['topic', 'interpretation', 'card', 'source']
+
+
+# Main page -> card pages -> rows of one website
+def scrape_site(fetcher, site, main_url):
+    main_page = fetcher.fetch(main_url)
+    if not main_page.ok:
+        return pd.DataFrame(columns=['source', 'topic', 'interpretation', 'card'])
+
+    card_links = site.get_card_links(main_page.text, main_url)
+    rows = []
+    for page in fetcher.fetch_all(card_links):
+        if page.ok:
+            rows.extend(site.parse_card_page(page.text, page.url))
+    return pd.DataFrame(rows, columns=['source', 'topic', 'interpretation', 'card'])
+
+
+# Label the source & bring card names to the canonical registry (unknown pages are dropped)
+def finalize_site(df, source):
+    df = df.drop(columns="source")
+    df['source'] = source
+    df['card'] = df['card'].map(normalize_card)
+    return df.dropna(subset=['card'])
+
+
+def build_final_df(fetcher, labyrinthos_url=labyrinthos.MAIN_URL, astrotalk_url=astrotalk.MAIN_URL,
+                   huggingface_rows=None):
+    all_data = finalize_site(scrape_site(fetcher, labyrinthos, labyrinthos_url), 'website_1')
+    all_data_third = finalize_site(scrape_site(fetcher, astrotalk, astrotalk_url), 'website_3')
+
+    if huggingface_rows is None:
+        huggingface_rows = huggingface.load_dataset_rows()
+        huggingface_rows['source'] = 'website_2'
+
+    final_df = pd.concat([all_data, huggingface_rows, all_data_third])
+    return final_df[COLUMNS].sort_values(by=['source', 'card', 'topic'])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape tarot card meanings into final_df.csv")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=2.0, help="max requests per second per host")
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=15)
+    parser.add_argument("--labyrinthos-url", default=labyrinthos.MAIN_URL)
+    parser.add_argument("--astrotalk-url", default=astrotalk.MAIN_URL)
+    parser.add_argument("--skip-huggingface", action="store_true")
+    parser.add_argument("--dedup", action="store_true")
+    parser.add_argument("--output", default=str(FINAL_DF_PATH))
+    args = parser.parse_args()
+
+    fetcher = Fetcher(max_workers=args.workers, rate_per_host=args.rate,
+                      retries=args.retries, timeout=args.timeout)
+
+    huggingface_rows = None
+    if args.skip_huggingface:
+        current = pd.read_csv(FINAL_DF_PATH)
+        huggingface_rows = current[current['source'] == 'website_2']
+
+    final_df = build_final_df(fetcher, args.labyrinthos_url, args.astrotalk_url, huggingface_rows)
+    if args.dedup:
+        from tarot_ai.ingestion.dedup import deduplicate
+        final_df, report = deduplicate(final_df)
+        print(f"Removed {report['removed_rows']} near-duplicates (-{report['shrink_percent']}% text)")
+    final_df.to_csv(args.output, index=False)
+
+    print(f"Saved {len(final_df)} rows to {args.output}")
+    print("Fetcher:", fetcher.stats())
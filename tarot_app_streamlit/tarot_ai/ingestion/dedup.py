@@ -0,0 +1,136 @@
+"""
+Near-duplicate removal for final_df.csv (MinHash + LSH):
+
+    python -m tarot_ai.ingestion.dedup --threshold 0.5
+
+The three sources often copy or lightly paraphrase each other. Interpretations of the
+same (card, topic) whose word-shingle Jaccard similarity reaches --threshold are
+clustered and only one representative per cluster is kept (the longest text, so no
+details are lost). Run it again after an incremental refresh.
+"""
+import argparse
+import re
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from tarot_ai.ingestion.build import FINAL_DF_PATH
+
+SHINGLE_WORDS = 3
+NUM_PERM = 128
+BANDS = 32  # 32 bands x 4 rows: pairs from ~0.4 similarity become candidates
+THRESHOLD = 0.5
+
+# Universal hashing h(x) = (a * x + b) mod p with a fixed seed (same signatures on every run)
+PRIME = (1 << 61) - 1
+_rng = np.random.default_rng(20240101)
+PERM_A = _rng.integers(1, 1 << 31, size=NUM_PERM, dtype=np.uint64)
+PERM_B = _rng.integers(0, 1 << 31, size=NUM_PERM, dtype=np.uint64)
+
+WORD_PATTERN = re.compile(r"[a-z0-9']+")
+
+
+def shingles(text, size=SHINGLE_WORDS):
+    words = WORD_PATTERN.findall(str(text).lower())
+    if len(words) < size:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+# MinHash signature: per permutation, the minimum hash over all shingles
+def minhash(text):
+    hashes = np.fromiter((zlib.crc32(shingle.encode('utf-8')) for shingle in shingles(text)), dtype=np.uint64)
+    # a < 2^31 and the hashes < 2^32, so a * x + b can't overflow uint64
+    permuted = (hashes[:, None] * PERM_A + PERM_B) % PRIME
+    return permuted.min(axis=0)
+
+
+def similarity(signature_a, signature_b):
+    return float(np.mean(signature_a == signature_b))
+
+
+def _find(parents, i):
+    while parents[i] != i:
+        parents[i] = parents[parents[i]]
+        i = parents[i]
+    return i
+
+
+# Cluster ids of the texts of one (card, topic); rows share a cluster when similarity >= threshold
+def cluster_texts(signatures, threshold=THRESHOLD, bands=BANDS):
+    parents = list(range(len(signatures)))
+    rows = NUM_PERM // bands
+    checked = set()
+    for band in range(bands):
+        buckets = {}
+        for i, signature in enumerate(signatures):
+            buckets.setdefault(signature[band * rows:(band + 1) * rows].tobytes(), []).append(i)
+
+        # Only LSH candidates are compared on the full signature
+        for members in buckets.values():
+            for position, i in enumerate(members):
+                for j in members[position + 1:]:
+                    if (i, j) in checked:
+                        continue
+                    checked.add((i, j))
+                    if similarity(signatures[i], signatures[j]) >= threshold:
+                        parents[_find(parents, j)] = _find(parents, i)
+    return [_find(parents, i) for i in range(len(signatures))]
+
+
+# Keep one representative per cluster of near-duplicates -> (deduplicated df, report)
+def deduplicate(df, threshold=THRESHOLD):
+    df = df.reset_index(drop=True)
+    keep = np.ones(len(df), dtype=bool)
+    clusters = 0
+
+    for _, group in df.groupby(['card', 'topic'], sort=False):
+        texts = group['interpretation'].astype(str)
+        signatures = [minhash(text) for text in texts]
+        labels = pd.Series(cluster_texts(signatures, threshold), index=group.index)
+        for _, members in labels.groupby(labels):
+            if len(members) == 1:
+                continue
+            clusters += 1
+            # The longest text keeps the most details of the cluster
+            representative = texts[members.index].str.len().idxmax()
+            keep[members.index.drop(representative)] = False
+
+    deduplicated = df[keep]
+    removed = df[~keep]
+    characters = df['interpretation'].astype(str).str.len().sum()
+    kept_characters = deduplicated['interpretation'].astype(str).str.len().sum()
+    report = {
+        "rows": len(df),
+        "kept_rows": len(deduplicated),
+        "removed_rows": len(removed),
+        "clusters": clusters,
+        "removed_by_source": removed['source'].value_counts().to_dict() if 'source' in removed else {},
+        "characters": int(characters),
+        "kept_characters": int(kept_characters),
+        "shrink_percent": round(100 * (1 - kept_characters / characters), 1) if characters else 0.0,
+    }
+    return deduplicated, report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Remove near-duplicate interpretations from final_df.csv")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="min Jaccard similarity of duplicates")
+    parser.add_argument("--input", default=str(FINAL_DF_PATH))
+    parser.add_argument("--output", default=str(FINAL_DF_PATH))
+    parser.add_argument("--dry-run", action="store_true", help="only print the report")
+    args = parser.parse_args()
+
+    final_df = pd.read_csv(args.input)
+    deduplicated, report = deduplicate(final_df, args.threshold)
+
+    print(f"Rows: {report['rows']} -> {report['kept_rows']} "
+          f"({report['removed_rows']} near-duplicates in {report['clusters']} clusters)")
+    print(f"Text: {report['characters']} -> {report['kept_characters']} characters "
+          f"(-{report['shrink_percent']}%)")
+    print("Removed by source:", report['removed_by_source'])
+
+    if not args.dry_run:
+        deduplicated.to_csv(args.output, index=False)
+        print(f"Saved {len(deduplicated)} rows to {args.output}")
@@ -0,0 +1,137 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+USER_AGENT = "Mozilla/5.0 (compatible; TarotAI-parser/1.0)"
+
+
+@dataclass
+class FetchResult:
+    url: str
+    status: int = None
+    text: str = ""
+    headers: dict = field(default_factory=dict)
+    seconds: float = 0.0
+    attempts: int = 0
+    error: str = None
+
+    @property
+    def ok(self):
+        return self.status is not None and 200 <= self.status < 300
+
+    # Answer to a conditional GET: the page didn't change
+    @property
+    def not_modified(self):
+        return self.status == 304
+
+
+# At most `rate` requests per second to each host
+class HostRateLimiter:
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate else 0
+        self.next_slot = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url):
+        if not self.interval:
+            return
+        host = urlsplit(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot.get(host, now))
+            self.next_slot[host] = slot + self.interval
+        time.sleep(max(0.0, slot - now))
+
+
+# Bounded-concurrency page fetcher over one pooled requests.Session
+class Fetcher:
+    def __init__(self, max_workers=8, rate_per_host=2.0, retries=3, backoff=0.5, timeout=15, session=None):
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.rate_limiter = HostRateLimiter(rate_per_host)
+
+        self.session = session or requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.setdefault("User-Agent", USER_AGENT)
+
+        self._lock = threading.Lock()
+        self.latencies = []
+        self.bytes = 0
+        self.failures = 0
+        self.retried = 0
+        self.wall_seconds = 0.0
+
+    def fetch(self, url, headers=None):
+        result = FetchResult(url=url)
+
+        for attempt in range(self.retries + 1):
+            result.attempts = attempt + 1
+            self.rate_limiter.wait(url)
+            retry_after = None
+            start = time.perf_counter()
+            try:
+                response = self.session.get(url, headers=headers, timeout=self.timeout)
+                result.status = response.status_code
+                result.headers = dict(response.headers)
+                result.text = response.text
+                result.error = None
+                if response.status_code not in RETRY_STATUSES:
+                    break
+                retry_after = response.headers.get("Retry-After")
+            except requests.RequestException as error:
+                result.error = f"{type(error).__name__}: {error}"
+            finally:
+                # Network time only (rate limiting & backoff waits are excluded)
+                result.seconds += time.perf_counter() - start
+
+            if attempt < self.retries:
+                with self._lock:
+                    self.retried += 1
+                delay = self.backoff * 2 ** attempt * (1 + random.random() / 2)
+                if retry_after and retry_after.isdigit():
+                    delay = max(delay, int(retry_after))
+                time.sleep(delay)
+
+        with self._lock:
+            self.latencies.append(result.seconds)
+            self.bytes += len(result.text.encode('utf-8'))
+            self.failures += not (result.ok or result.not_modified)
+        if not (result.ok or result.not_modified):
+            print(f"[WARNING] Unable to retrieve page: {url} ({result.error or result.status})")
+        return result
+
+    # Fetch pages concurrently; results keep the order of `urls`
+    # `headers` maps a url to extra request headers (e.g. for conditional GETs)
+    def fetch_all(self, urls, headers=None):
+        headers = headers or {}
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = list(executor.map(lambda url: self.fetch(url, headers.get(url)), urls))
+        with self._lock:
+            self.wall_seconds += time.perf_counter() - start
+        return results
+
+    def stats(self):
+        with self._lock:
+            latencies = np.array(self.latencies) if self.latencies else np.zeros(1)
+            return {
+                "pages": len(self.latencies),
+                "failures": self.failures,
+                "retries": self.retried,
+                "mb": round(self.bytes / 2**20, 2),
+                "pages_per_s": round(len(self.latencies) / self.wall_seconds, 2) if self.wall_seconds else None,
+                "p50_s": round(float(np.percentile(latencies, 50)), 4),
+                "p95_s": round(float(np.percentile(latencies, 95)), 4),
+            }
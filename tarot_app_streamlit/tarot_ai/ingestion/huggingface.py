@@ -0,0 +1,70 @@
+# Second dataset - Hugging Face
+import re
+
+from tarot_ai.cards import normalize_card
+
+DATASET = "quanquyt/Detailed_Tarot_meanings"
+
+
+# Define the topic
+def get_topic(query: str) -> str:
+    q_lower = query.lower().strip()
+    if q_lower.endswith("career"):
+        return "career"
+    elif q_lower.endswith("love"):
+        return "love"
+    elif q_lower.endswith("finances"):
+        return "finance"
+    elif "the general meaning of" in q_lower:
+        return "general"
+    else:
+        return None
+
+
+# Exctract the name of a Tarot Card
+def extract_card_name(text: str) -> str:
+    prefix = text.split(":", 1)[0].strip()
+
+    # Remove redundant text
+    prefix = re.sub(r"(?i)^the general meaning of the\s*", "", prefix)
+    prefix = re.sub(r"(?i)^the general meaning of\s*", "", prefix)
+    prefix = re.sub(r"(?i)^the general meaning\s*", "", prefix)
+    prefix = re.sub(r"(?i)^the\s+", "", prefix)
+    prefix = re.sub(r"(?i)\s+is$", "", prefix)
+    prefix = re.sub(r"(?i)\s+meaning$", "", prefix)
+
+    return prefix.strip()
+
+
+# Delete Redundant text
+def remove_prefix_before_colon(text: str) -> str:
+    parts = text.split(":", 1)
+    if len(parts) > 1:
+        return parts[1].strip()
+    return text  # if there's no colon, return as is
+
+
+# Rows (topic, interpretation, card) from the raw dataset
+def parse_dataset(df):
+    # Remove redundant text
+    mask_short = df['query'].str.startswith("The short meaning of", na=False)
+    mask_keywords = df['query'].str.startswith("the keywords meaning of", na=False)
+    df = df[~(mask_short | mask_keywords)].copy()
+
+    df['topic'] = df['query'].apply(get_topic)
+    df['card_name'] = df['document'].apply(extract_card_name).map(normalize_card)
+    df = df.dropna(subset=['card_name'])
+    df['document'] = df['document'].apply(remove_prefix_before_colon)
+
+    df.sort_values(by=["card_name", "topic"], inplace=True)
+    df.drop_duplicates(subset=["card_name", "topic"], keep="first", inplace=True)
+
+    df = df[['topic', 'document', 'card_name']]
+    return df.rename(columns={'document': 'interpretation', 'card_name': 'card'})
+
+
+def load_dataset_rows():
+    from datasets import load_dataset
+
+    ds = load_dataset(DATASET)
+    return parse_dataset(ds["train"].to_pandas())
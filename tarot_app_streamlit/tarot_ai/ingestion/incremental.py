@@ -0,0 +1,166 @@
+"""
+Incremental refresh of final_df.csv:
+
+    python -m tarot_ai.ingestion.incremental --workers 8
+
+Card pages are fetched with conditional GETs (ETag / Last-Modified from the manifest),
+only changed pages are parsed and only changed (source, card, topic) rows are upserted.
+Keyword & summary rows of the changed (card, topic) pairs are reported as stale.
+The Hugging Face dataset is static and is not refreshed here.
+"""
+import argparse
+import hashlib
+import json
+import time
+
+import pandas as pd
+
+from tarot_ai.ingestion import astrotalk, labyrinthos
+from tarot_ai.ingestion.build import FINAL_DF_PATH, finalize_site
+from tarot_ai.ingestion.fetcher import Fetcher
+from tarot_ai.knowledge_base import DATA_DIR
+
+MANIFEST_PATH = DATA_DIR / 'ingestion_manifest.json'
+KEY = ['source', 'card', 'topic']
+
+SITES = {
+    'website_1': (labyrinthos, labyrinthos.MAIN_URL),
+    'website_3': (astrotalk, astrotalk.MAIN_URL),
+}
+
+
+def load_manifest(path=MANIFEST_PATH):
+    if not path.exists():
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_manifest(manifest, path=MANIFEST_PATH):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+
+
+def conditional_headers(entry):
+    headers = {}
+    if entry.get('etag'):
+        headers['If-None-Match'] = entry['etag']
+    if entry.get('last_modified'):
+        headers['If-Modified-Since'] = entry['last_modified']
+    return headers
+
+
+# Rows of the card pages that changed since the last refresh
+def fetch_changed_rows(fetcher, manifest, source, site, main_url, report):
+    main_page = fetcher.fetch(main_url)
+    if not main_page.ok:
+        return pd.DataFrame(columns=KEY + ['interpretation'])
+
+    card_links = site.get_card_links(main_page.text, main_url)
+    headers = {url: conditional_headers(manifest.get(url, {})) for url in card_links}
+
+    rows = []
+    for page in fetcher.fetch_all(card_links, headers):
+        if page.not_modified:
+            report['not_modified'] += 1
+            continue
+        if not page.ok:
+            continue
+
+        content_hash = hashlib.sha256(page.text.encode('utf-8')).hexdigest()
+        entry = manifest.get(page.url, {})
+        manifest[page.url] = {
+            'source': source,
+            'etag': page.headers.get('ETag'),
+            'last_modified': page.headers.get('Last-Modified'),
+            'sha256': content_hash,
+            'fetched_at': time.time(),
+        }
+        if entry.get('sha256') == content_hash:
+            report['same_content'] += 1
+            continue
+
+        report['changed_pages'].append(page.url)
+        rows.extend(site.parse_card_page(page.text, page.url))
+
+    report['missing_pages'].extend(
+        url for url, entry in manifest.items() if entry.get('source') == source and url not in headers
+    )
+    if not rows:
+        return pd.DataFrame(columns=KEY + ['interpretation'])
+    return finalize_site(pd.DataFrame(rows, columns=['source', 'topic', 'interpretation', 'card']), source)
+
+
+# Insert new & replace changed (source, card, topic) rows; returns the new table & changed keys
+def upsert_rows(final_df, new_rows):
+    if new_rows.empty:
+        return final_df, new_rows[KEY]
+
+    merged = new_rows.merge(final_df[KEY + ['interpretation']], on=KEY, how='left', suffixes=('', '_old'))
+    changed = merged[merged['interpretation'] != merged['interpretation_old']][KEY + ['interpretation']]
+    if changed.empty:
+        return final_df, changed[KEY]
+
+    keys = pd.MultiIndex.from_frame(changed[KEY])
+    kept = final_df[~pd.MultiIndex.from_frame(final_df[KEY]).isin(keys)]
+    updated = pd.concat([kept, changed])[final_df.columns].sort_values(by=['source', 'card', 'topic'])
+    return updated, changed[KEY]
+
+
+# Keyword & summary rows built from interpretations that changed
+def stale_rows(changed_keys, data_dir=DATA_DIR):
+    pairs = changed_keys[['card', 'topic']].drop_duplicates()
+    stale = {}
+    for name in ('keywords_df_tarot.csv', 'summary_df_tarot.csv'):
+        dataset = pd.read_csv(data_dir / name)
+        stale[name] = dataset.merge(pairs, on=['card', 'topic'])[['card', 'topic']]
+    return stale
+
+
+def refresh(fetcher, sites=SITES, final_df_path=FINAL_DF_PATH, manifest_path=MANIFEST_PATH):
+    start = time.perf_counter()
+    manifest = load_manifest(manifest_path)
+    final_df = pd.read_csv(final_df_path)
+    report = {'not_modified': 0, 'same_content': 0, 'changed_pages': [], 'missing_pages': []}
+
+    new_rows = pd.concat([
+        fetch_changed_rows(fetcher, manifest, source, site, main_url, report)
+        for source, (site, main_url) in sites.items()
+    ])
+    final_df, changed_keys = upsert_rows(final_df, new_rows)
+
+    if not changed_keys.empty:
+        final_df.to_csv(final_df_path, index=False)
+    save_manifest(manifest, manifest_path)
+
+    report['changed_rows'] = changed_keys
+    report['stale'] = stale_rows(changed_keys, final_df_path.parent)
+    report['seconds'] = round(time.perf_counter() - start, 2)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incrementally refresh final_df.csv")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=2.0, help="max requests per second per host")
+    parser.add_argument("--labyrinthos-url", default=labyrinthos.MAIN_URL)
+    parser.add_argument("--astrotalk-url", default=astrotalk.MAIN_URL)
+    args = parser.parse_args()
+
+    fetcher = Fetcher(max_workers=args.workers, rate_per_host=args.rate)
+    sites = {
+        'website_1': (labyrinthos, args.labyrinthos_url),
+        'website_3': (astrotalk, args.astrotalk_url),
+    }
+    report = refresh(fetcher, sites)
+
+    print(f"Refreshed in {report['seconds']} s: {len(report['changed_pages'])} changed pages, "
+          f"{report['not_modified']} not modified, {report['same_content']} with the same content")
+    if report['missing_pages']:
+        print(f"[WARNING] {len(report['missing_pages'])} pages are no longer linked from the main page")
+    print(f"Upserted rows: {len(report['changed_rows'])}")
+    for name, rows in report['stale'].items():
+        if not rows.empty:
+            print(f"Stale rows in {name}:")
+            print(rows.to_string(index=False))
+    print("Fetcher:", fetcher.stats())
@@ -0,0 +1,104 @@
+# First website - labyrinthos
+import re
+
+from bs4 import BeautifulSoup
+
+MAIN_URL = "https://labyrinthos.co/blogs/tarot-card-meanings-list/"
+
+TOPICS_PATTERNS = {
+    'general': re.compile(
+        r"(Upright.*Meaning)"
+        r"|(.*Strengths)"  # (2) Suit of Cups Strengths
+        r"|(.*Weaknesses)" # (3) Suit of Cups Weaknesses
+    ),
+
+    'love': re.compile(
+        r"(Upright.*Meaning:\s*Love\s*$)"           # (1) "Upright ... Meaning: Love"
+        r"|(Tarot Love Meaning\s*-\s*Upright.*)"    # (2) "Tarot Love Meaning - Upright ..."
+        r"|(Upright.*Tarot Love Meaning.*)"         # (3) "Upright Ace of Wands Tarot Love Meaning"
+        r"|(.*Love Meaning\s*\(Upright\).*)"        # (4) "Death Tarot Card Love Meaning (Upright)"
+        r"|(.*in Love)"                             # (5) The Suit of Cups in Love
+        r"|(Upright.*Love Meaning)"                 # (6) Upright Hierophant Love Meaning
+    ),
+
+    'career': re.compile(
+        r"(Career Meaning\s*[–-]\s*Upright.*)"
+        r"|(Upright Career Meaning -.*)"            # (2) Upright Career Meaning - 2 of Cups
+        r"|(.*in Career and Creativity)"            # (3) The Suit of Cups in Career and Creativity
+    ),
+
+    'finance': re.compile(
+        r"(Finances Meaning\s*[–-]\s*Upright.*)"
+        r"|(Upright Finances Meaning -.*)"          # (2) Upright Finances Meaning - 2 of Cups
+        r"|(.*in Finances)"                         # (3) The Suit of Cups in Finances
+    ),
+}
+
+SUIT_WORDS = ("the-suit-of-cups", "the-suit-of-pentacles",
+              "the-suit-of-swords", "the-suit-of-wands")
+
+
+# Find interpretations
+def get_section_text(start_tag, stop_tags=('h1', 'h2', 'h3', 'h4')):
+    texts = []
+    for sibling in start_tag.next_siblings:
+        if sibling.name in stop_tags:
+            break
+        if sibling.name == 'p':
+            texts.append(sibling.get_text(strip=True))
+        elif sibling.name == 'div':
+            p_tags = sibling.find_all('p')
+            texts.extend([p.get_text(strip=True) for p in p_tags if p.get_text(strip=True)])
+    return " ".join(texts)
+
+
+# Extract the name of a Tarot Card
+def extract_card_name(soup):
+    title_tag = soup.find('title')
+    if not title_tag:
+        return "Unknown Card"
+    title_text = title_tag.get_text(strip=True)
+    card_name = re.split(r'\bMeaning\b', title_text)[0].strip()
+    card_name = card_name.replace("Tarot Card", "").strip()
+    return card_name
+
+
+# Rows (source, topic, interpretation, card) of one card page
+def parse_card_page(html, url):
+    soup = BeautifulSoup(html, 'html.parser')
+    card_name = extract_card_name(soup)
+
+    # Collect all headings (h1..h4)
+    headings = soup.find_all(re.compile('^h[1-4]$'))
+    data = []
+
+    for topic, pattern in TOPICS_PATTERNS.items():
+        # Find the first heading that matches the regex
+        matched_tag = next((h for h in headings if pattern.search(h.get_text(strip=True))), None)
+
+        if matched_tag:
+            data.append({
+                'source': url,
+                'topic': topic,
+                'interpretation': get_section_text(matched_tag, stop_tags=('h1', 'h2', 'h3', 'h4')),
+                'card': card_name
+            })
+        else:
+            print(f"[WARNING] No heading found for '{topic}' (pattern='{pattern.pattern}') on page: {url}")
+
+    return data
+
+
+# Links to all card pages from the main page (without the suit overviews)
+def get_card_links(html, main_url=MAIN_URL):
+    soup = BeautifulSoup(html, 'html.parser')
+    path = "/" + main_url.split("/", 3)[3]
+    base = main_url[:-len(path)]
+
+    card_links = set()
+    for a_tag in soup.find_all('a', href=True):
+        href = a_tag['href']
+        if href.startswith(path) and href != path:
+            card_links.add(base + href)
+
+    return sorted(link for link in card_links if not any(word in link.lower() for word in SUIT_WORDS))
@@ -0,0 +1,120 @@
+"""
+Pre-generated card interpretations for stage 2 of the Prompt-based Bot.
+
+Stage 2 only depends on (card, topic), so all 78 x 4 interpretations are generated
+offline and the bot assembles the stage from this file instead of calling GPT:
+
+    python -m tarot_ai.interpretation_store --workers 8
+"""
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+import streamlit as st
+
+from tarot_ai.cards import normalize_card
+from tarot_ai.knowledge_base import DATA_DIR, TOPIC_NAMES, load_knowledge_base
+from tarot_ai.llm import get_model_response
+from tarot_ai.prompts import ROLE_PROMPT
+
+STORE_PATH = DATA_DIR / 'interpretations_df_tarot.csv'
+
+# Bump when the prompt below changes: rows with another version are regenerated
+STORE_VERSION = "v1"
+
+COLUMNS = ['card', 'topic', 'interpretation', 'version']
+
+
+def build_card_prompt(card, topic):
+    return f"""
+    You will be provided with a Tarot card and the overall theme of the prediction.
+
+    **Your task**:
+    Interpret the card based on the provided theme in one paragraph.
+
+    Prediction theme: {topic}
+
+    Card: {card}
+    """
+
+
+# Read the store, keeping only rows of the current version
+def load_store(path=STORE_PATH):
+    if not path.exists():
+        return pd.DataFrame(columns=COLUMNS)
+    store = pd.read_csv(path)
+    return store[store['version'] == STORE_VERSION]
+
+
+# (card, topic) -> interpretation, shared by all sessions
+@st.cache_resource(show_spinner=False)
+def get_interpretation_store():
+    store = load_store()
+    cards = store['card'].map(normalize_card)
+    topics = store['topic'].replace(TOPIC_NAMES)
+    return dict(zip(zip(cards, topics), store['interpretation']))
+
+
+# Stage 2 text in the same format the model is asked for; None if any card is missing
+def assemble_card_interpretation(cards, topic):
+    store = get_interpretation_store()
+    lines = []
+    for number, card in enumerate(cards, start=1):
+        interpretation = store.get((card, topic))
+        if interpretation is None:
+            return None
+        lines.append(f"Card {number}: {interpretation}")
+    return "\n".join(lines)
+
+
+def generate_interpretation(card, topic):
+    return get_model_response([
+        {"role": "system", "content": ROLE_PROMPT},
+        {"role": "user", "content": build_card_prompt(card, topic)}
+    ], stage="interpretation", use_cache=False, bot="interpretation_store")
+
+
+def build_store(workers=4, path=STORE_PATH):
+    kb = load_knowledge_base()
+    store = load_store(path)
+    done = set(zip(store['card'], store['topic']))
+
+    # Topic names as in the other datasets (career, finance, love, general)
+    dataset_topics = {name: topic for topic, name in TOPIC_NAMES.items()}
+    todo = [
+        (card, topic) for card in kb.cards for topic in TOPIC_NAMES.values()
+        if (card, dataset_topics[topic]) not in done
+    ]
+    print(f"{len(done)} interpretations up to date, {len(todo)} to generate")
+
+    rows = store.to_dict('records')
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(generate_interpretation, card, topic): (card, topic)
+            for card, topic in todo
+        }
+        for future in as_completed(futures):
+            card, topic = futures[future]
+            try:
+                interpretation = future.result()
+            except Exception as error:
+                print(f"[WARNING] Unable to interpret {card} / {topic}: {error}")
+                continue
+            rows.append({
+                'card': card,
+                'topic': dataset_topics[topic],
+                'interpretation': interpretation.strip(),
+                'version': STORE_VERSION
+            })
+
+    result = pd.DataFrame(rows, columns=COLUMNS).sort_values(by=['topic', 'card'])
+    result.to_csv(path, index=False)
+    print(f"Saved {len(result)} interpretations to {path}")
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-generate stage 2 card interpretations")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+    build_store(workers=args.workers)
@@ -0,0 +1,142 @@
+import logging
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import pandas as pd
+import streamlit as st
+
+from tarot_ai.cards import CARD_IDS, CARDS, card_id, normalize_card
+
+logger = logging.getLogger(__name__)
+
+# Folder with final_df.csv, keywords_df_tarot.csv & summary_df_tarot.csv
+DATA_DIR = Path(__file__).resolve().parent.parent
+
+# Response cache, call logs & other runtime files
+CACHE_DIR = Path(os.environ.get("TAROT_CACHE_DIR", DATA_DIR / '.cache'))
+
+# Topic values in the datasets -> topic names shown in the bots
+TOPIC_NAMES = {
+    'general': 'Other',
+    'career': 'Career',
+    'finance': 'Finances',
+    'love': 'Love'
+}
+TOPICS = ["Career", "Finances", "Love", "Other"]
+TOPIC_IDS = {topic: topic_id for topic_id, topic in enumerate(TOPICS)}
+
+
+# Position of (card, topic) in the array indexes; None for unknown cards / topics
+def slot(card, topic):
+    card_number = card_id(card)
+    topic_number = TOPIC_IDS.get(topic)
+    if card_number is None or topic_number is None:
+        return None
+    return card_number * len(TOPICS) + topic_number
+
+
+@dataclass(frozen=True)
+class KnowledgeBase:
+    interpretations: pd.DataFrame
+    keywords: pd.DataFrame
+    summaries: pd.DataFrame
+    cards: tuple
+    # slot(card, topic) -> tuple of texts
+    interpretation_index: tuple
+    keyword_index: tuple
+    summary_index: tuple
+    load_seconds: float
+    memory_bytes: int
+
+    @staticmethod
+    def _lookup(index, card, topic):
+        position = slot(card, topic)
+        return [] if position is None else list(index[position])
+
+    def get_card_interpretations(self, cards, topic):
+        return {card: self._lookup(self.interpretation_index, card, topic) for card in cards}
+
+    def get_card_keywords(self, cards, topic):
+        return {card: self._lookup(self.keyword_index, card, topic) for card in cards}
+
+    def get_card_summaries(self, cards, topic):
+        return {card: self._lookup(self.summary_index, card, topic) for card in cards}
+
+    def stats(self):
+        return {
+            "cards": len(self.cards),
+            "interpretations": len(self.interpretations),
+            "keywords": len(self.keywords),
+            "summaries": len(self.summaries),
+            "load_seconds": round(self.load_seconds, 4),
+            "memory_mb": round(self.memory_bytes / 2**20, 2),
+            "format": "csv",
+        }
+
+
+# Read a dataset, rename topics & bring card names to the canonical registry
+def read_dataset(data_dir, file_name):
+    df = pd.read_csv(Path(data_dir) / file_name)
+    df['topic'] = df['topic'].replace(TOPIC_NAMES)
+    df['card'] = df['card'].map(normalize_card)
+
+    unknown = df['card'].isna()
+    if unknown.any():
+        logger.warning("%s: dropped %d rows with unknown card names", file_name, unknown.sum())
+    return df[~unknown].reset_index(drop=True)
+
+
+# Group texts by (card, topic) once into an array indexed by slot(card, topic)
+def _build_index(df, column):
+    index = [[] for _ in range(len(CARDS) * len(TOPICS))]
+    for card, topic, text in zip(df['card'], df['topic'], df[column]):
+        position = slot(card, topic)
+        if position is not None:
+            index[position].append(text)
+    return tuple(tuple(texts) for texts in index)
+
+
+def load_knowledge_base(data_dir=DATA_DIR):
+    start = time.perf_counter()
+
+    interpretations = read_dataset(data_dir, 'final_df.csv')
+    keywords = read_dataset(data_dir, 'keywords_df_tarot.csv')
+    summaries = read_dataset(data_dir, 'summary_df_tarot.csv')
+
+    interpretation_index = _build_index(interpretations, 'interpretation')
+    keyword_index = _build_index(keywords, 'keyword')
+    summary_index = _build_index(summaries, 'summary')
+
+    load_seconds = time.perf_counter() - start
+    memory_bytes = int(sum(
+        df.memory_usage(deep=True).sum() for df in (interpretations, keywords, summaries)
+    ))
+
+    kb = KnowledgeBase(
+        interpretations=interpretations,
+        keywords=keywords,
+        summaries=summaries,
+        cards=tuple(sorted(set(interpretations['card']), key=CARD_IDS.get)),
+        interpretation_index=interpretation_index,
+        keyword_index=keyword_index,
+        summary_index=summary_index,
+        load_seconds=load_seconds,
+        memory_bytes=memory_bytes,
+    )
+    logger.info("Knowledge base loaded: %s", kb.stats())
+    return kb
+
+
+# One copy per server process, shared by all sessions & pages
+# (the memory-mapped knowledge pack if it can be used, the CSVs otherwise)
+@st.cache_resource(show_spinner=False)
+def get_knowledge_base():
+    from tarot_ai.knowledge_pack import load_or_build_pack
+
+    try:
+        return load_or_build_pack()
+    except (OSError, ValueError) as error:
+        logger.warning("Knowledge pack unavailable (%s), reading the CSVs", error)
+        return load_knowledge_base()
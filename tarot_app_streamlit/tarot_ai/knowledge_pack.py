@@ -0,0 +1,181 @@
+"""
+Compact binary knowledge pack: the three datasets in one memory-mapped file.
+
+    python -m tarot_ai.knowledge_pack
+
+Layout: magic | header length | JSON header | numpy arrays | UTF-8 text blob.
+Cards are registry IDs (tarot_ai.cards), topics are categories, texts are offsets into
+the blob and rows are sorted by (card, topic), so a lookup is two array reads. Server workers that map the same
+file share its pages instead of each parsing the CSVs.
+"""
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import time
+
+import numpy as np
+
+from tarot_ai.cards import CARD_IDS, CARDS
+from tarot_ai.knowledge_base import DATA_DIR, TOPIC_IDS, TOPICS, read_dataset, slot
+
+logger = logging.getLogger(__name__)
+
+PACK_PATH = DATA_DIR / 'knowledge_pack.bin'
+PACK_VERSION = 2
+MAGIC = b"TAROTKP1"
+
+# Table -> (source file, text column)
+TABLES = {
+    'interpretations': ('final_df.csv', 'interpretation'),
+    'keywords': ('keywords_df_tarot.csv', 'keyword'),
+    'summaries': ('summary_df_tarot.csv', 'summary'),
+}
+
+
+# Hashes of the CSVs the pack was built from (a pack of other data is stale)
+def source_hashes(data_dir=DATA_DIR):
+    hashes = {}
+    for file_name, _ in TABLES.values():
+        with open(data_dir / file_name, 'rb') as f:
+            hashes[file_name] = hashlib.sha256(f.read()).hexdigest()
+    return hashes
+
+
+def build_pack(data_dir=DATA_DIR, path=PACK_PATH):
+    frames = {name: read_dataset(data_dir, file_name) for name, (file_name, _) in TABLES.items()}
+    cards = sorted(set(frames['interpretations']['card']), key=CARD_IDS.get)
+    slots = np.arange(len(CARDS) * len(TOPICS))
+
+    arrays = {}
+    blob = bytearray()
+    for name, (_, column) in TABLES.items():
+        df = frames[name]
+        df = df.assign(card_id=df['card'].map(CARD_IDS), topic_id=df['topic'].map(TOPIC_IDS))
+        df = df.dropna(subset=['card_id', 'topic_id']).sort_values(by=['card_id', 'topic_id'], kind='stable')
+
+        texts = [text.encode('utf-8') for text in df[column].astype(str)]
+        offsets = np.zeros(len(texts) + 1, dtype=np.uint64)
+        offsets[1:] = np.cumsum([len(text) for text in texts], dtype=np.uint64)
+        offsets += len(blob)
+        blob += b"".join(texts)
+
+        # Rows of slot card_id * len(TOPICS) + topic_id are slot_start[slot]:slot_end[slot]
+        row_slots = df['card_id'].to_numpy(np.uint32) * len(TOPICS) + df['topic_id'].to_numpy(np.uint32)
+        arrays[f"{name}.card_id"] = df['card_id'].to_numpy(np.uint16)
+        arrays[f"{name}.topic_id"] = df['topic_id'].to_numpy(np.uint8)
+        arrays[f"{name}.offsets"] = offsets
+        arrays[f"{name}.slot_start"] = np.searchsorted(row_slots, slots, side='left').astype(np.uint32)
+        arrays[f"{name}.slot_end"] = np.searchsorted(row_slots, slots, side='right').astype(np.uint32)
+
+    # Array positions are relative to the (8-byte aligned) data section
+    layout = {}
+    position = 0
+    for name, array in arrays.items():
+        layout[name] = {"offset": position, "dtype": array.dtype.str, "count": len(array)}
+        position += -(-array.nbytes // 8) * 8
+    header = {
+        "version": PACK_VERSION,
+        "sources": source_hashes(data_dir),
+        "cards": cards,
+        "registry_size": len(CARDS),
+        "topics": TOPICS,
+        "arrays": layout,
+        "blob": {"offset": position, "size": len(blob)},
+    }
+    header_bytes = json.dumps(header).encode('utf-8')
+    header_end = len(MAGIC) + 4 + len(header_bytes)
+    padding = -header_end % 8
+
+    # Write next to the target & rename, so other workers never map a half-written pack
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=path.name)
+    with os.fdopen(fd, 'wb') as f:
+        f.write(MAGIC + struct.pack("<I", len(header_bytes)) + header_bytes + b"\0" * padding)
+        for array in arrays.values():
+            f.write(array.tobytes())
+            f.write(b"\0" * (-array.nbytes % 8))
+        f.write(bytes(blob))
+    os.replace(tmp_path, path)
+    return path
+
+
+class KnowledgePack:
+    def __init__(self, path=PACK_PATH):
+        start = time.perf_counter()
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mm[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a knowledge pack")
+        (header_size,) = struct.unpack_from("<I", self._mm, len(MAGIC))
+        header_start = len(MAGIC) + 4
+        self.header = json.loads(self._mm[header_start:header_start + header_size])
+        data_start = header_start + header_size
+        data_start += -data_start % 8
+
+        self.cards = tuple(self.header['cards'])
+        self._arrays = {
+            name: np.frombuffer(self._mm, dtype=spec['dtype'], count=spec['count'],
+                                offset=data_start + spec['offset'])
+            for name, spec in self.header['arrays'].items()
+        }
+        self._blob_start = data_start + self.header['blob']['offset']
+        self.load_seconds = time.perf_counter() - start
+
+    def rows(self, table):
+        return len(self._arrays[f"{table}.card_id"])
+
+    def text(self, table, row):
+        offsets = self._arrays[f"{table}.offsets"]
+        start = self._blob_start + int(offsets[row])
+        return self._mm[start:self._blob_start + int(offsets[row + 1])].decode('utf-8')
+
+    def _texts(self, table, card, topic):
+        position = slot(card, topic)
+        if position is None:
+            return []
+        start = int(self._arrays[f"{table}.slot_start"][position])
+        end = int(self._arrays[f"{table}.slot_end"][position])
+        return [self.text(table, row) for row in range(start, end)]
+
+    def get_card_interpretations(self, cards, topic):
+        return {card: self._texts('interpretations', card, topic) for card in cards}
+
+    def get_card_keywords(self, cards, topic):
+        return {card: self._texts('keywords', card, topic) for card in cards}
+
+    def get_card_summaries(self, cards, topic):
+        return {card: self._texts('summaries', card, topic) for card in cards}
+
+    def stats(self):
+        return {
+            "cards": len(self.cards),
+            "interpretations": self.rows('interpretations'),
+            "keywords": self.rows('keywords'),
+            "summaries": self.rows('summaries'),
+            "load_seconds": round(self.load_seconds, 4),
+            "memory_mb": round(len(self._mm) / 2**20, 2),
+            "format": f"pack v{self.header['version']} (memory-mapped)",
+        }
+
+
+# Map the pack, (re)building it first if it's missing or built from other data
+def load_or_build_pack(data_dir=DATA_DIR, path=PACK_PATH):
+    if path.exists():
+        pack = KnowledgePack(path)
+        if (pack.header['version'] == PACK_VERSION and pack.header['registry_size'] == len(CARDS)
+                and pack.header['sources'] == source_hashes(data_dir)):
+            return pack
+        logger.info("Knowledge pack %s is stale, rebuilding", path)
+    build_pack(data_dir, path)
+    return KnowledgePack(path)
+
+
+if __name__ == "__main__":
+    path = build_pack()
+    print(f"Saved knowledge pack to {path} ({path.stat().st_size / 2**20:.2f} MB)")
+    print(KnowledgePack(path).stats())
@@ -0,0 +1,150 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+
+import streamlit as st
+from openai import OpenAI
+
+from tarot_ai.metrics import get_metrics
+from tarot_ai.response_cache import get_response_cache, make_cache_key
+from tarot_ai.routing import passes_check, resolve_route
+from tarot_ai.scheduler import current_session, get_scheduler
+from tarot_ai.singleflight import get_singleflight
+
+logger = logging.getLogger(__name__)
+
+TEMPERATURE = 0.7
+
+# Stages where every reading should be different -> never served from the cache
+UNCACHED_STAGES = {"final", "personalization", "single_call"}
+
+
+# Benchmarks set this to False to measure uncached pipelines
+CACHE_ENABLED = True
+
+_client_override = None
+
+
+# GPT client (created once per server process); "OpenAI_base_url" points it to another endpoint
+@st.cache_resource(show_spinner=False)
+def _get_default_client():
+    return OpenAI(api_key=st.secrets["OpenAI_key"], base_url=st.secrets.get("OpenAI_base_url"))
+
+
+# Injection point for benchmarks & tests (e.g. a client of the local mock server)
+def set_client(client):
+    global _client_override
+    _client_override = client
+
+
+def get_client():
+    if _client_override is not None:
+        return _client_override
+    return _get_default_client()
+
+
+# GPT call (model=None -> the model of the bot's stage in tarot_ai.routing);
+# response_format constrains the answer (e.g. to a JSON schema);
+# use_cache=False asks for a fresh answer (e.g. independent samples), never shared with identical calls
+def get_model_response(messages, model=None, stage=None, use_cache=None, bot=None, response_format=None):
+    fresh = use_cache is False
+    if use_cache is None:
+        use_cache = CACHE_ENABLED and stage not in UNCACHED_STAGES
+    route = resolve_route(bot, stage, model)
+
+    start = time.perf_counter()
+    key = make_cache_key(route.model, TEMPERATURE, messages, response_format)
+    if use_cache:
+        cache = get_response_cache()
+        cached_response = cache.get(key)
+        if cached_response is not None:
+            get_metrics().record(bot, stage, route.model, time.perf_counter() - start, cache_hit=True)
+            return cached_response
+
+    if fresh or stage in UNCACHED_STAGES:
+        content = _call_routed(messages, route, stage, bot, response_format)
+    else:
+        # Identical calls already in flight (other sessions, double clicks) share one answer
+        content, shared = get_singleflight().do(key, lambda: _call_routed(messages, route, stage, bot, response_format))
+        if shared:
+            get_metrics().record(bot, stage, route.model, time.perf_counter() - start, coalesced=True)
+            return content
+
+    # Empty answers (e.g. refusals of structured output) aren't cached
+    if use_cache and content:
+        cache.set(key, route.model, content)
+    return content
+
+
+# Cascade: an answer of the small model that fails the local check is asked again from the fallback
+def _call_routed(messages, route, stage, bot, response_format=None):
+    content = _call_model(messages, route.model, stage, bot, response_format)
+    if route.fallback is not None and not passes_check(stage, content):
+        logger.info("%s / %s: %s answer failed the check, asking %s", bot, stage, route.model, route.fallback)
+        content = _call_model(messages, route.fallback, stage, bot, response_format, escalated_from=route.model)
+    return content
+
+
+def _call_model(messages, model, stage, bot, response_format=None, **extra):
+    # Wait for the global scheduler (rate limits, fairness between sessions, priorities)
+    scheduler = get_scheduler()
+    with scheduler.slot(stage, messages) as ticket:
+        start = time.perf_counter()
+        response = get_client().chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=TEMPERATURE,
+            **({"response_format": response_format} if response_format else {})
+        )
+    scheduler.settle(ticket, getattr(response.usage, "total_tokens", 0))
+    get_metrics().record(bot, stage, model, time.perf_counter() - start, usage=response.usage,
+                         queue_wait_s=round(ticket.wait_seconds, 4), **extra)
+    return response.choices[0].message.content
+
+
+# Streaming GPT call: yields the answer chunk by chunk (never cached, no cascade)
+def stream_model_response(messages, model=None, stage=None, timeline=None, bot=None):
+    # The stream is read later (e.g. by the chat bubble), so the session is taken now
+    model = resolve_route(bot, stage, model).model
+    return _stream_model_response(messages, model, stage, timeline, bot, current_session.get())
+
+
+def _stream_model_response(messages, model, stage, timeline, bot, session):
+    scheduler = get_scheduler()
+    with timeline.stage(stage) if timeline else nullcontext({}) as record, \
+            scheduler.slot(stage, messages, session) as ticket:
+        start = time.perf_counter()
+        stream = get_client().chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=TEMPERATURE,
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+        usage = None
+        first_token = True
+        for chunk in stream:
+            # The last chunk has no choices, only the token usage
+            if chunk.usage is not None:
+                usage = chunk.usage
+            if not chunk.choices:
+                continue
+            text = chunk.choices[0].delta.content
+            if not text:
+                continue
+            if first_token:
+                first_token = False
+                record["ttft_s"] = round(time.perf_counter() - start, 3)
+                logger.info("Time to first token (%s, %s): %.3f s", stage, model, record["ttft_s"])
+            yield text
+
+        scheduler.settle(ticket, getattr(usage, "total_tokens", 0))
+        get_metrics().record(bot, stage, model, time.perf_counter() - start, usage=usage,
+                             ttft_s=record.get("ttft_s"), queue_wait_s=round(ticket.wait_seconds, 4))
+
+
+# Thread pool for GPT calls that run next to each other (shared by all sessions)
+@st.cache_resource(show_spinner=False)
+def get_executor():
+    return ThreadPoolExecutor(max_workers=16, thread_name_prefix="gpt")
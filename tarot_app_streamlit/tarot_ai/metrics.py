@@ -0,0 +1,190 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from logging.handlers import RotatingFileHandler
+
+import pandas as pd
+import streamlit as st
+
+from tarot_ai.knowledge_base import CACHE_DIR
+
+LOG_PATH = CACHE_DIR / 'llm_calls.jsonl'
+LOG_MAX_BYTES = 5 * 2**20
+LOG_BACKUPS = 3
+
+# USD per 1M tokens: (input, cached input, output)
+PRICES = {
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+}
+
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 40)
+
+
+def estimate_cost(model, prompt_tokens, completion_tokens, cached_tokens=0):
+    input_price, cached_price, output_price = PRICES.get(model, PRICES["gpt-4o"])
+    return (
+        (prompt_tokens - cached_tokens) * input_price
+        + cached_tokens * cached_price
+        + completion_tokens * output_price
+    ) / 1e6
+
+
+# Token counts from response.usage (missing for cached answers & some streams)
+def usage_tokens(usage):
+    if usage is None:
+        return 0, 0, 0
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached_tokens = getattr(details, "cached_tokens", 0) or 0
+    return usage.prompt_tokens, usage.completion_tokens, cached_tokens
+
+
+class CallMetrics:
+    def __init__(self, log_path=LOG_PATH):
+        self.log_path = log_path
+        self._lock = threading.Lock()
+        self.calls = defaultdict(int)
+        self.tokens = defaultdict(int)
+        self.cost = defaultdict(float)
+        self.latency_sum = defaultdict(float)
+        self.latency_buckets = defaultdict(lambda: [0] * len(LATENCY_BUCKETS))
+        self.collectors = []
+
+        self.log_path.parent.mkdir(parents=True, exist_ok=True)
+        self._logger = logging.getLogger(f"{__name__}.calls")
+        self._logger.propagate = False
+        self._logger.setLevel(logging.INFO)
+        if not self._logger.handlers:
+            handler = RotatingFileHandler(self.log_path, maxBytes=LOG_MAX_BYTES,
+                                          backupCount=LOG_BACKUPS, encoding='utf-8')
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self._logger.addHandler(handler)
+
+    def record(self, bot, stage, model, seconds, usage=None, cache_hit=False, **extra):
+        prompt_tokens, completion_tokens, cached_tokens = usage_tokens(usage)
+        cost = 0.0 if cache_hit else estimate_cost(model, prompt_tokens, completion_tokens, cached_tokens)
+        labels = (bot or "unknown", stage or "unknown", model)
+
+        with self._lock:
+            self.calls[labels] += 1
+            self.tokens[labels + ("prompt",)] += prompt_tokens
+            self.tokens[labels + ("completion",)] += completion_tokens
+            self.tokens[labels + ("cached",)] += cached_tokens
+            self.cost[labels] += cost
+            self.latency_sum[labels] += seconds
+            buckets = self.latency_buckets[labels]
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    buckets[i] += 1
+
+        self._logger.info(json.dumps({
+            "time": time.time(),
+            "bot": labels[0],
+            "stage": labels[1],
+            "model": model,
+            "seconds": round(seconds, 4),
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "cached_tokens": cached_tokens,
+            "cost_usd": round(cost, 6),
+            "cache_hit": cache_hit,
+            **extra,
+        }))
+
+    # Other components add their metrics to the exposition (a function returning Prometheus text)
+    def add_collector(self, collector):
+        self.collectors.append(collector)
+
+    # Prometheus text exposition format
+    def prometheus_text(self):
+        lines = [
+            "# HELP tarot_llm_calls_total GPT calls per bot, stage and model",
+            "# TYPE tarot_llm_calls_total counter",
+        ]
+        with self._lock:
+            for (bot, stage, model), value in sorted(self.calls.items()):
+                lines.append(f'tarot_llm_calls_total{{bot="{bot}",stage="{stage}",model="{model}"}} {value}')
+
+            lines += ["# HELP tarot_llm_tokens_total Tokens per bot, stage, model and kind",
+                      "# TYPE tarot_llm_tokens_total counter"]
+            for (bot, stage, model, kind), value in sorted(self.tokens.items()):
+                lines.append(f'tarot_llm_tokens_total{{bot="{bot}",stage="{stage}",model="{model}",kind="{kind}"}} {value}')
+
+            lines += ["# HELP tarot_llm_cost_usd_total Estimated API cost in USD",
+                      "# TYPE tarot_llm_cost_usd_total counter"]
+            for (bot, stage, model), value in sorted(self.cost.items()):
+                lines.append(f'tarot_llm_cost_usd_total{{bot="{bot}",stage="{stage}",model="{model}"}} {value:.6f}')
+
+            lines += ["# HELP tarot_llm_latency_seconds Wall time of GPT calls",
+                      "# TYPE tarot_llm_latency_seconds histogram"]
+            for (bot, stage, model), buckets in sorted(self.latency_buckets.items()):
+                labels = f'bot="{bot}",stage="{stage}",model="{model}"'
+                for bound, value in zip(LATENCY_BUCKETS, buckets):
+                    lines.append(f'tarot_llm_latency_seconds_bucket{{{labels},le="{bound}"}} {value}')
+                count = self.calls[(bot, stage, model)]
+                lines.append(f'tarot_llm_latency_seconds_bucket{{{labels},le="+Inf"}} {count}')
+                lines.append(f'tarot_llm_latency_seconds_sum{{{labels}}} {self.latency_sum[(bot, stage, model)]:.4f}')
+                lines.append(f'tarot_llm_latency_seconds_count{{{labels}}} {count}')
+        return "\n".join(lines) + "\n" + "".join(collector() for collector in self.collectors)
+
+
+# Read the call log (incl. rotated files) for the metrics page
+def load_call_log(log_path=LOG_PATH):
+    records = []
+    for path in [log_path.with_name(f"{log_path.name}.{i}") for i in range(LOG_BACKUPS, 0, -1)] + [log_path]:
+        if path.exists():
+            with open(path, encoding='utf-8') as f:
+                records.extend(json.loads(line) for line in f if line.strip())
+    return pd.DataFrame(records)
+
+
+# p50 / p95 latency & mean tokens per bot and stage
+def summarize_calls(calls):
+    if calls.empty:
+        return calls
+    grouped = calls.groupby(["bot", "stage"])
+    return pd.DataFrame({
+        "calls": grouped.size(),
+        "p50_s": grouped["seconds"].quantile(0.5),
+        "p95_s": grouped["seconds"].quantile(0.95),
+        "prompt_tokens": grouped["prompt_tokens"].mean(),
+        "completion_tokens": grouped["completion_tokens"].mean(),
+        "cached_tokens": grouped["cached_tokens"].mean(),
+        # Time spent waiting for the scheduler (only logged since it exists)
+        "p95_queue_wait_s": grouped["queue_wait_s"].quantile(0.95) if "queue_wait_s" in calls else None,
+    }).round(3).assign(
+        # Share of the prompt tokens served by the provider's prefix cache
+        cached_share=(grouped["cached_tokens"].sum() / grouped["prompt_tokens"].sum().clip(lower=1)).round(3),
+        cost_usd=grouped["cost_usd"].sum().round(5),
+    ).reset_index()
+
+
+def _start_metrics_server(metrics, port):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = metrics.prometheus_text().encode('utf-8')
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("0.0.0.0", port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+
+# One collector per server process; set TAROT_METRICS_PORT to expose it for Prometheus
+@st.cache_resource(show_spinner=False)
+def get_metrics():
+    metrics = CallMetrics()
+    port = os.environ.get("TAROT_METRICS_PORT")
+    if port:
+        _start_metrics_server(metrics, int(port))
+    return metrics
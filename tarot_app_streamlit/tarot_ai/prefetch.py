@@ -0,0 +1,164 @@
+# Speculative prefetch of the bot pages: the cards don't depend on the story and some stages
+# only depend on the topic & cards, so both start as soon as a topic is selected, while the
+# user is still typing. "✨ Get Prediction" then only pays for the story-dependent stages.
+# The next reading's prefetch starts when the topic or story is edited after a reading.
+import os
+import random
+import threading
+import time
+from collections import Counter, deque
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from tarot_ai.llm import get_executor
+from tarot_ai.metrics import get_metrics
+from tarot_ai.scheduler import session_scope
+
+# Opt-in: TAROT_PREFETCH=1 (every prefetch that isn't used costs its GPT calls)
+ENABLED = os.environ.get("TAROT_PREFETCH", "0") == "1"
+
+# GPT calls of prefetches that weren't used, per hour (process-wide); past it only cards are prefetched
+MAX_WASTED_CALLS_PER_HOUR = int(os.environ.get("TAROT_PREFETCH_MAX_WASTED", "100"))
+
+SESSION_KEY = "prefetch"
+
+
+class Prefetch:
+    def __init__(self, topic, story, cards, work=None):
+        self.topic = topic
+        self.story = story  # latest story seen while unused
+        self.cards = cards
+        self.work = work  # Future of the card-only stage (None if the bot has none)
+        self.used = False
+
+
+class PrefetchStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = 0
+        self.used = 0
+        self.wasted = Counter()
+        self.wasted_calls = 0
+        self.capped = 0  # prefetches started without their GPT stage because of the cap
+        self._recent_wasted_calls = deque()  # times of the wasted calls in the last hour
+
+    def count(self, outcome, reason=None, called=False):
+        with self._lock:
+            if outcome == "started":
+                self.started += 1
+            elif outcome == "used":
+                self.used += 1
+            else:
+                if outcome == "unused":
+                    self.used -= 1  # taken by a reading that didn't need it after all
+                self.wasted[reason] += 1
+                if called:
+                    self.wasted_calls += 1
+                    self._recent_wasted_calls.append(time.monotonic())
+
+    def _wasted_calls_last_hour(self):
+        while self._recent_wasted_calls and self._recent_wasted_calls[0] < time.monotonic() - 3600:
+            self._recent_wasted_calls.popleft()
+        return len(self._recent_wasted_calls)
+
+    # True if a prefetch may start its GPT stage (False counts it as capped)
+    def allow_call(self):
+        with self._lock:
+            if self._wasted_calls_last_hour() < MAX_WASTED_CALLS_PER_HOUR:
+                return True
+            self.capped += 1
+            return False
+
+    def stats(self):
+        with self._lock:
+            wasted = sum(self.wasted.values())
+            return {
+                "enabled": ENABLED,
+                "started": self.started,
+                "used": self.used,
+                "wasted": wasted,
+                "pending": self.started - self.used - wasted,  # incl. sessions that left without a reading
+                "wasted_rate": round(wasted / (self.used + wasted), 3) if self.used + wasted else 0.0,
+                "wasted_reasons": dict(self.wasted),
+                "wasted_calls": self.wasted_calls,
+                "wasted_calls_last_hour": self._wasted_calls_last_hour(),
+                "max_wasted_calls_per_hour": MAX_WASTED_CALLS_PER_HOUR,
+                "capped": self.capped,
+            }
+
+    def prometheus_text(self):
+        lines = [
+            "# HELP tarot_prefetch_total Prefetches of cards & card-only stages by outcome",
+            "# TYPE tarot_prefetch_total counter",
+            f'tarot_prefetch_total{{outcome="started"}} {self.started}',
+            f'tarot_prefetch_total{{outcome="used"}} {self.used}',
+        ]
+        lines += [f'tarot_prefetch_total{{outcome="wasted",reason="{reason}"}} {value}'
+                  for reason, value in sorted(self.wasted.items())]
+        lines += [
+            "# HELP tarot_prefetch_wasted_calls_total GPT calls of prefetched stages that weren't used",
+            "# TYPE tarot_prefetch_wasted_calls_total counter",
+            f"tarot_prefetch_wasted_calls_total {self.wasted_calls}",
+            "# HELP tarot_prefetch_capped_total Prefetches started without their GPT stage (wasted calls cap)",
+            "# TYPE tarot_prefetch_capped_total counter",
+            f"tarot_prefetch_capped_total {self.capped}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+@st.cache_resource(show_spinner=False)
+def get_prefetch_stats():
+    stats = PrefetchStats()
+    get_metrics().add_collector(stats.prometheus_text)
+    return stats
+
+
+def _run(work, session_id, topic, cards):
+    with session_scope(session_id):
+        return work(topic, cards)
+
+
+def _discard(prefetch, reason):
+    # Not started yet -> no GPT call; already running -> its answer still lands in the response cache
+    called = prefetch.work is not None and not prefetch.work.cancel()
+    get_prefetch_stats().count("wasted", reason, called=called)
+
+
+# Page side: draw the cards for the selected topic & start work(topic, cards) in the background,
+# once per topic selection. After a reading, the next one starts only once the topic or story is edited.
+def prefetch_for_topic(topic, story, list_tarot, work=None):
+    current = st.session_state.get(SESSION_KEY)
+    if current is not None:
+        if not current.used and current.topic == topic:
+            current.story = story
+            return current
+        if current.used and (current.topic, current.story) == (topic, story):
+            return None
+        if not current.used:
+            _discard(current, "topic changed")
+
+    cards = random.sample(list_tarot, 3)
+    ctx = get_script_run_ctx()
+    future = None
+    if work is not None and get_prefetch_stats().allow_call():
+        future = get_executor().submit(_run, work, ctx.session_id if ctx else None, topic, cards)
+    st.session_state[SESSION_KEY] = Prefetch(topic, story, cards, future)
+    get_prefetch_stats().count("started")
+    return st.session_state[SESSION_KEY]
+
+
+# The session's prefetch for a reading on this topic, None if there's none (or it's used already)
+def take_prefetch(topic):
+    current = st.session_state.get(SESSION_KEY)
+    if current is None or current.used or current.topic != topic:
+        return None
+    current.used = True
+    get_prefetch_stats().count("used")
+    return current
+
+
+# Bot side: the prefetched work wasn't needed after all (e.g. the query was rejected);
+# called=False if it was cancelled before its GPT call
+def record_unused(reason, called=True):
+    get_prefetch_stats().count("unused", reason, called=called)
@@ -0,0 +1,231 @@
+import hashlib
+import json
+import logging
+import math
+import random
+import re
+import threading
+import time
+from collections import Counter, deque
+from logging.handlers import RotatingFileHandler
+
+import streamlit as st
+
+from tarot_ai.knowledge_base import CACHE_DIR
+from tarot_ai.llm import get_model_response
+
+# Answers of the validation prompt
+ACCEPT_RESPONSE = "The query is clear."
+REJECT_RESPONSE = "I cannot make a prediction based on your query. Please revise your question, story or topic."
+
+LOG_PATH = CACHE_DIR / 'validations.jsonl'
+LOG_MAX_BYTES = 2 * 2**20
+LOG_BACKUPS = 1
+
+MIN_STORY_WORDS = 3  # shorter stories (and questions) are left to GPT
+MIN_QUESTION_WORDS = 2
+CLEAR_STORY_WORDS = 12  # longer stories with a real question are accepted
+SHADOW_RATE = 0.05  # share of screened queries still sent to GPT to measure agreement
+MIN_TRAINING_SAMPLES = 100  # logged validations needed to train the classifier
+MAX_TRAINING_SAMPLES = 5000  # the classifier learns from the latest ones
+CLASSIFIER_CONFIDENCE = 0.95
+
+TOPIC_WORDS = {
+    "Career": {"job", "work", "career", "boss", "interview", "promotion", "office", "colleague",
+               "colleagues", "company", "project", "business", "profession", "hired", "fired", "position"},
+    "Finances": {"money", "finance", "finances", "salary", "debt", "loan", "invest", "investment",
+                 "savings", "income", "rich", "budget", "mortgage", "pay", "financial"},
+    "Love": {"love", "relationship", "boyfriend", "girlfriend", "partner", "husband", "wife", "crush",
+             "date", "dating", "marriage", "marry", "ex", "romance", "feelings", "breakup"},
+}
+QUESTION_WORDS = {"will", "what", "how", "should", "when", "why", "is", "can", "does", "do", "would", "where", "who"}
+
+
+def _words(text):
+    return re.findall(r"[^\W\d_]+", text.lower())
+
+
+# Keyboard mashing: a single letter repeated ("kkkkkk") or a long latin word without vowels
+def _is_gibberish_word(word):
+    if re.fullmatch(r"(.)\1{3,}", word):
+        return True
+    return word.isascii() and len(word) > 3 and not re.search(r"[aeiouy]", word)
+
+
+def _looks_like_gibberish(text):
+    words = [w for w in _words(text) if len(w) > 3]
+    return bool(words) and sum(map(_is_gibberish_word, words)) / len(words) > 0.5
+
+
+# Tokens + length buckets used by the classifier
+def _features(user_input):
+    story_words = _words(user_input['story'])
+    question_words = _words(user_input['question'])
+    return (
+        [f"s:{w}" for w in story_words]
+        + [f"q:{w}" for w in question_words]
+        + [f"topic:{user_input['topic']}",
+           f"story_len:{min(len(story_words) // 5, 10)}",
+           f"question_len:{min(len(question_words) // 3, 5)}"]
+    )
+
+
+# Features as they are logged: hashed, so the log keeps no user text
+def _hashed_features(user_input):
+    return [hashlib.sha256(f.encode()).hexdigest()[:12] for f in _features(user_input)]
+
+
+# Small multinomial Naive Bayes with a scikit-style fit / predict_proba interface
+class NaiveBayesClassifier:
+    def __init__(self, alpha=1.0):
+        self.alpha = alpha
+        self.class_counts = Counter()
+        self.feature_counts = {}
+        self.vocabulary = set()
+
+    def fit(self, samples, labels):
+        self.class_counts = Counter(labels)
+        self.feature_counts = {label: Counter() for label in self.class_counts}
+        for features, label in zip(samples, labels):
+            self.feature_counts[label].update(features)
+            self.vocabulary.update(features)
+        return self
+
+    def predict_proba(self, features):
+        total = sum(self.class_counts.values())
+        log_probs = {}
+        for label, count in self.class_counts.items():
+            counts = self.feature_counts[label]
+            denominator = sum(counts.values()) + self.alpha * len(self.vocabulary)
+            log_prob = math.log(count / total)
+            for feature in features:
+                if feature in self.vocabulary:
+                    log_prob += math.log((counts[feature] + self.alpha) / denominator)
+            log_probs[label] = log_prob
+        top = max(log_probs.values())
+        norm = sum(math.exp(p - top) for p in log_probs.values())
+        return {label: math.exp(p - top) / norm for label, p in log_probs.items()}
+
+
+class QueryScreener:
+    def __init__(self, log_path=LOG_PATH, shadow_rate=SHADOW_RATE):
+        self.log_path = log_path
+        self.shadow_rate = shadow_rate
+        self.classifier = None
+        self.screened = 0
+        self.avoided_calls = 0
+        self.llm_fallbacks = 0
+        self.shadow_checks = 0
+        self.agreements = 0
+        self._lock = threading.Lock()
+
+        self.log_path.parent.mkdir(parents=True, exist_ok=True)
+        self._logger = logging.getLogger(f"{__name__}.validations")
+        self._logger.propagate = False
+        self._logger.setLevel(logging.INFO)
+        if not self._logger.handlers:
+            handler = RotatingFileHandler(self.log_path, maxBytes=LOG_MAX_BYTES,
+                                          backupCount=LOG_BACKUPS, encoding='utf-8')
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self._logger.addHandler(handler)
+        self.train()
+
+    # Fit the classifier on the latest logged GPT validations (if there are enough of them)
+    def train(self):
+        records = deque(maxlen=MAX_TRAINING_SAMPLES)
+        for path in [self.log_path.with_name(f"{self.log_path.name}.{i}") for i in range(LOG_BACKUPS, 0, -1)] \
+                + [self.log_path]:
+            if path.exists():
+                with open(path, encoding='utf-8') as f:
+                    records.extend(json.loads(line) for line in f if line.strip())
+        if len(records) < MIN_TRAINING_SAMPLES or len({r['llm'] for r in records}) < 2:
+            return
+        # Records from before hashing keep the raw text: their features are hashed on load
+        self.classifier = NaiveBayesClassifier().fit(
+            [r['features'] if 'features' in r else _hashed_features(r) for r in records],
+            [r['llm'] for r in records]
+        )
+
+    # "accept" / "reject" for clear-cut queries, None if GPT should decide
+    def screen(self, user_input):
+        story_words = _words(user_input['story'])
+        question_words = _words(user_input['question'])
+
+        if not story_words or not question_words:
+            return "reject"
+        # Short but maybe fine ("Career?"): GPT decides
+        if len(story_words) < MIN_STORY_WORDS or len(question_words) < MIN_QUESTION_WORDS:
+            return None
+        if _looks_like_gibberish(user_input['story']) or _looks_like_gibberish(user_input['question']):
+            return "reject"
+
+        # Off-topic looking queries aren't rejected here (e.g. a lost job under Finances): GPT decides
+        topic_words = TOPIC_WORDS.get(user_input['topic'])
+        text_words = set(story_words) | set(question_words)
+        is_question = user_input['question'].strip().endswith("?") or question_words[0] in QUESTION_WORDS
+        on_topic = topic_words is None or bool(text_words & topic_words)
+        if len(story_words) >= CLEAR_STORY_WORDS and is_question and on_topic:
+            return "accept"
+
+        if self.classifier is not None:
+            probabilities = self.classifier.predict_proba(_hashed_features(user_input))
+            label, probability = max(probabilities.items(), key=lambda item: item[1])
+            if probability >= CLASSIFIER_CONFIDENCE:
+                return label
+        return None
+
+    # Count the screening; True if GPT can be skipped (some screened queries are still shadow-checked)
+    def skip_llm(self, decision):
+        with self._lock:
+            self.screened += 1
+            if decision is None or random.random() < self.shadow_rate:
+                return False
+            self.avoided_calls += 1
+            return True
+
+    def record(self, user_input, decision, llm_decision):
+        with self._lock:
+            if decision is None:
+                self.llm_fallbacks += 1
+            else:
+                self.shadow_checks += 1
+                self.agreements += decision == llm_decision
+
+        # Rotated log (bounded on disk), written outside the lock
+        self._logger.info(json.dumps({
+            "time": time.time(),
+            "topic": user_input['topic'],
+            "features": _hashed_features(user_input),
+            "screener": decision,
+            "llm": llm_decision,
+        }, ensure_ascii=False))
+
+    def stats(self):
+        return {
+            "screened": self.screened,
+            "avoided_calls": self.avoided_calls,
+            "llm_fallbacks": self.llm_fallbacks,
+            "shadow_checks": self.shadow_checks,
+            "agreement_rate": round(self.agreements / self.shadow_checks, 3) if self.shadow_checks else None,
+            "classifier": self.classifier is not None,
+        }
+
+
+# One screener per server process
+@st.cache_resource(show_spinner=False)
+def get_query_screener():
+    return QueryScreener()
+
+
+# Validation stage: answer locally when the query is clear-cut, otherwise ask GPT
+def validate_query(user_input, messages, bot=None):
+    screener = get_query_screener()
+    decision = screener.screen(user_input)
+
+    if screener.skip_llm(decision):
+        return ACCEPT_RESPONSE if decision == "accept" else REJECT_RESPONSE
+
+    response = get_model_response(messages, stage="validation", bot=bot)
+    llm_decision = "reject" if "cannot make a prediction" in response else "accept"
+    screener.record(user_input, decision, llm_decision)
+    return response
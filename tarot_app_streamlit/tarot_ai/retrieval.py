@@ -0,0 +1,281 @@
+"""
+Relevance-ranked retrieval over the parsed interpretations (final_df.csv).
+
+    python -m tarot_ai.retrieval
+
+The interpretations are split into short passages and indexed with TF-IDF once, at build
+time, into a .npz file next to the data. A lookup only scores the passages of one
+(card, topic) slot against the user's story & question, so it's a few vectorized NumPy ops.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+from collections import Counter
+
+import numpy as np
+import streamlit as st
+
+from tarot_ai.cards import CARD_IDS, CARDS
+from tarot_ai.knowledge_base import DATA_DIR, TOPIC_IDS, TOPICS, read_dataset, slot
+
+logger = logging.getLogger(__name__)
+
+INDEX_PATH = DATA_DIR / 'retrieval_index.npz'
+INDEX_VERSION = 1
+SOURCE_FILE = 'final_df.csv'
+
+# Sentences are grouped into passages of at least this many words
+PASSAGE_WORDS = 60
+
+# Defaults for a reading: passages per card & prompt tokens for all cards together
+TOP_K = 3
+TOKEN_BUDGET = 900
+
+STOP_WORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before being
+below between both but by can could did do does doing down during each few for from further had
+has have having he her here hers herself him himself his how i if in into is it its itself just
+me more most my myself no nor not now of off on once only or other our ours ourselves out over own
+same she should so some such than that the their theirs them themselves then there these they this
+those through to too under until up very was we were what when where which while who whom why will
+with would you your yours yourself yourselves card cards tarot upright reversed
+""".split())
+
+TOKEN_PATTERN = re.compile(r"[a-z][a-z']+")
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+")
+
+
+# Lowercase words without stop words & plural 's' (same rules for passages and queries)
+def tokenize(text):
+    terms = []
+    for word in TOKEN_PATTERN.findall(str(text).lower()):
+        word = word.strip("'")
+        if word.endswith("'s"):
+            word = word[:-2]
+        if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+            word = word[:-1]
+        if len(word) > 1 and word not in STOP_WORDS:
+            terms.append(word)
+    return terms
+
+
+# Rough prompt size of a text (~4 characters per token for English)
+def estimate_tokens(text):
+    return -(-len(text) // 4)
+
+
+def split_passages(text, min_words=PASSAGE_WORDS):
+    passages = []
+    current = []
+    words = 0
+    for sentence in SENTENCE_PATTERN.split(str(text).strip()):
+        current.append(sentence)
+        words += len(sentence.split())
+        if words >= min_words:
+            passages.append(" ".join(current))
+            current = []
+            words = 0
+    # A short tail joins the previous passage instead of standing alone
+    if current:
+        if passages and words < min_words // 2:
+            passages[-1] += " " + " ".join(current)
+        else:
+            passages.append(" ".join(current))
+    return passages
+
+
+def source_hash(data_dir=DATA_DIR):
+    with open(data_dir / SOURCE_FILE, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _text_array(texts):
+    encoded = [text.encode('utf-8') for text in texts]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.uint64)
+    offsets[1:] = np.cumsum([len(text) for text in encoded], dtype=np.uint64)
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def build_index(data_dir=DATA_DIR, path=INDEX_PATH):
+    df = read_dataset(data_dir, SOURCE_FILE)
+    df = df.assign(card_id=df['card'].map(CARD_IDS), topic_id=df['topic'].map(TOPIC_IDS))
+    df = df.dropna(subset=['card_id', 'topic_id']).sort_values(by=['card_id', 'topic_id'], kind='stable')
+
+    passages = []
+    passage_slots = []
+    passage_terms = []
+    for card_id, topic_id, interpretation in zip(df['card_id'], df['topic_id'], df['interpretation']):
+        for passage in split_passages(interpretation):
+            terms = tokenize(passage)
+            if not terms:
+                continue
+            passages.append(passage)
+            passage_slots.append(int(card_id) * len(TOPICS) + int(topic_id))
+            passage_terms.append(Counter(terms))
+
+    vocabulary = sorted({term for terms in passage_terms for term in terms})
+    term_ids = {term: i for i, term in enumerate(vocabulary)}
+
+    # Smoothed idf over passages
+    document_frequency = np.zeros(len(vocabulary), dtype=np.float64)
+    for terms in passage_terms:
+        document_frequency[[term_ids[term] for term in terms]] += 1
+    idf = np.log((1 + len(passages)) / (1 + document_frequency)) + 1
+
+    # Sparse rows (CSR): sublinear tf * idf, L2-normalized per passage
+    term_ptr = np.zeros(len(passages) + 1, dtype=np.uint32)
+    indices = []
+    weights = []
+    for i, terms in enumerate(passage_terms):
+        ids = np.array([term_ids[term] for term in terms], dtype=np.uint32)
+        row = (1 + np.log(np.fromiter(terms.values(), dtype=np.float64, count=len(terms)))) * idf[ids]
+        row /= np.linalg.norm(row)
+        indices.append(ids)
+        weights.append(row.astype(np.float32))
+        term_ptr[i + 1] = term_ptr[i] + len(ids)
+
+    row_slots = np.array(passage_slots, dtype=np.uint32)
+    slots = np.arange(len(CARDS) * len(TOPICS))
+    text, text_offsets = _text_array(passages)
+    vocabulary_text, vocabulary_offsets = _text_array(vocabulary)
+    meta = {"version": INDEX_VERSION, "source": source_hash(data_dir), "registry_size": len(CARDS),
+            "topics": TOPICS, "passage_words": PASSAGE_WORDS}
+
+    arrays = {
+        "meta": np.frombuffer(json.dumps(meta).encode('utf-8'), dtype=np.uint8),
+        "idf": idf.astype(np.float32),
+        "vocabulary": vocabulary_text,
+        "vocabulary_offsets": vocabulary_offsets,
+        "slot_start": np.searchsorted(row_slots, slots, side='left').astype(np.uint32),
+        "slot_end": np.searchsorted(row_slots, slots, side='right').astype(np.uint32),
+        "term_ptr": term_ptr,
+        "term_ids": np.concatenate(indices) if indices else np.zeros(0, dtype=np.uint32),
+        "term_weights": np.concatenate(weights) if weights else np.zeros(0, dtype=np.float32),
+        "text": text,
+        "text_offsets": text_offsets,
+    }
+
+    # Write next to the target & rename, so other workers never read a half-written index
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix='.npz')
+    with os.fdopen(fd, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, path)
+    return path
+
+
+class RetrievalIndex:
+    def __init__(self, path=INDEX_PATH):
+        start = time.perf_counter()
+        self.path = path
+        with np.load(path, allow_pickle=False) as data:
+            self._arrays = {name: data[name] for name in data.files}
+        self.meta = json.loads(self._arrays.pop('meta').tobytes())
+
+        vocabulary = self._arrays['vocabulary'].tobytes()
+        offsets = self._arrays['vocabulary_offsets']
+        self.term_ids = {vocabulary[offsets[i]:offsets[i + 1]].decode('utf-8'): i
+                         for i in range(len(offsets) - 1)}
+        self._text = self._arrays['text'].tobytes()
+        self.load_seconds = time.perf_counter() - start
+
+    def passages(self):
+        return len(self._arrays['term_ptr']) - 1
+
+    def text(self, row):
+        offsets = self._arrays['text_offsets']
+        return self._text[offsets[row]:offsets[row + 1]].decode('utf-8')
+
+    # Query vector over the vocabulary (unknown words are ignored)
+    def query_vector(self, query):
+        vector = np.zeros(len(self.term_ids), dtype=np.float32)
+        terms = Counter(term for term in tokenize(query) if term in self.term_ids)
+        if terms:
+            ids = np.array([self.term_ids[term] for term in terms])
+            counts = np.fromiter(terms.values(), dtype=np.float32, count=len(terms))
+            vector[ids] = (1 + np.log(counts)) * self._arrays['idf'][ids]
+        return vector
+
+    # Passages of one card & topic, best match first, as (score, text)
+    def search(self, card, topic, query, query_vector=None):
+        position = slot(card, topic)
+        if position is None:
+            return []
+        start = int(self._arrays['slot_start'][position])
+        end = int(self._arrays['slot_end'][position])
+        if start == end:
+            return []
+        if query_vector is None:
+            query_vector = self.query_vector(query)
+
+        term_ptr = self._arrays['term_ptr']
+        first, last = int(term_ptr[start]), int(term_ptr[end])
+        contributions = query_vector[self._arrays['term_ids'][first:last]] * self._arrays['term_weights'][first:last]
+        scores = np.add.reduceat(contributions, (term_ptr[start:end] - first).astype(np.intp))
+        # Stable sort keeps the source order between equally scored passages
+        order = np.argsort(-scores, kind='stable')
+        return [(float(scores[i]), self.text(start + i)) for i in order]
+
+    # Top-k passages per card within a shared token budget: {card: [passage, ...]}
+    def retrieve(self, cards, topic, query, k=TOP_K, token_budget=TOKEN_BUDGET):
+        query_vector = self.query_vector(query)
+        card_budget = token_budget // max(len(cards), 1)
+        selected = {}
+        for card in cards:
+            passages = []
+            used = 0
+            for _, passage in self.search(card, topic, query, query_vector):
+                size = estimate_tokens(passage)
+                # Sources often repeat each other word for word
+                if passage in passages or used + size > card_budget:
+                    continue
+                passages.append(passage)
+                used += size
+                if len(passages) == k:
+                    break
+            selected[card] = passages
+        return selected
+
+    def stats(self):
+        return {
+            "passages": self.passages(),
+            "vocabulary": len(self.term_ids),
+            "load_seconds": round(self.load_seconds, 4),
+            "memory_mb": round(sum(array.nbytes for array in self._arrays.values()) / 2**20, 2),
+            "format": f"tf-idf v{self.meta['version']}",
+        }
+
+
+# Load the index, (re)building it first if it's missing or built from other data
+def load_or_build_index(data_dir=DATA_DIR, path=INDEX_PATH):
+    if path.exists():
+        index = RetrievalIndex(path)
+        if (index.meta['version'] == INDEX_VERSION and index.meta['registry_size'] == len(CARDS)
+                and index.meta['passage_words'] == PASSAGE_WORDS
+                and index.meta['source'] == source_hash(data_dir)):
+            return index
+        logger.info("Retrieval index %s is stale, rebuilding", path)
+    build_index(data_dir, path)
+    return RetrievalIndex(path)
+
+
+# Loaded once per server process & shared by all sessions
+@st.cache_resource(show_spinner=False)
+def get_retrieval_index():
+    return load_or_build_index()
+
+
+if __name__ == "__main__":
+    path = build_index()
+    print(f"Saved retrieval index to {path} ({path.stat().st_size / 2**20:.2f} MB)")
+    index = RetrievalIndex(path)
+    print(index.stats())
+    selected = index.retrieve(["The Fool", "Ace of Cups"], "Career",
+                              "I want to quit my job and start a creative business. Should I take the risk?")
+    for card, passages in selected.items():
+        print(f"\n{card}:")
+        for passage in passages:
+            print(f"- {passage[:160]}...")
@@ -0,0 +1,110 @@
+"""
+Model routing: which model answers each stage of each bot.
+
+Cheap stages (validation & the drafts that the final stage rewrites) go to the small model.
+Their answer passes a local check (expected format) or the call is repeated on the large
+model (cascade). The local check is too weak to judge a reading, so what the user sees is
+always written by the large model: the final stage, or, with the structure check
+(TAROT_STRUCTURE_CHECK=1), a draft shown without the final call. In that mode the drafts go
+to the large model too (see draft_is_final).
+
+TAROT_MODEL_ROUTING=0 sends every stage to the large model (baseline for comparisons).
+"""
+import os
+import re
+from collections import namedtuple
+
+import pandas as pd
+
+from tarot_ai.metrics import estimate_cost
+from tarot_ai.structure import ENABLED as STRUCTURE_CHECK
+
+ENABLED = os.environ.get("TAROT_MODEL_ROUTING", "1") == "1"
+
+LARGE_MODEL = "gpt-4o"
+SMALL_MODEL = "gpt-4o-mini"
+
+# model: first try, fallback: model of the retry when the local check fails (None = no cascade)
+Route = namedtuple("Route", ["model", "fallback"])
+
+STAGE_ROUTES = {
+    "validation": Route(SMALL_MODEL, LARGE_MODEL),
+    "interpretation": Route(SMALL_MODEL, LARGE_MODEL),
+    # Drafts may be shown as the reading with the structure check -> the final-stage model
+    "preliminary": Route(LARGE_MODEL, None) if STRUCTURE_CHECK else Route(SMALL_MODEL, LARGE_MODEL),
+}
+
+# Per-bot exceptions to STAGE_ROUTES
+BOT_ROUTES = {
+    # Offline datasets: stored for good, so quality matters more than cost
+    "interpretation_store": {"interpretation": Route(LARGE_MODEL, None)},
+}
+
+MIN_DRAFT_CHARS = 200
+CARD_LINE = re.compile(r"card\s*№?\s*([123])\b", re.IGNORECASE)
+
+
+def resolve_route(bot, stage, model=None):
+    # An explicit model always wins (e.g. offline tools)
+    if model is not None:
+        return Route(model, None)
+    if not ENABLED:
+        return Route(LARGE_MODEL, None)
+    return BOT_ROUTES.get(bot, {}).get(stage) or STAGE_ROUTES.get(stage) or Route(LARGE_MODEL, None)
+
+
+# True if the bot's drafts come from the model of its final stage (only then can a draft be
+# shown without the final call)
+def draft_is_final(bot):
+    draft, final = resolve_route(bot, "preliminary"), resolve_route(bot, "final")
+    return draft.model == final.model and draft.fallback is None
+
+
+# Local quality check of a small-model answer: False -> ask the fallback model
+def passes_check(stage, content):
+    if not content:
+        return False
+    if stage == "validation":
+        return "The query is clear." in content or "cannot make a prediction" in content
+    if stage in ("interpretation", "preliminary"):
+        cards = {match.group(1) for match in CARD_LINE.finditer(content)}
+        return cards == {"1", "2", "3"} and len(content) >= MIN_DRAFT_CHARS
+    return True
+
+
+# Cost & latency of the routed calls vs. sending the same calls to the large model
+def summarize_routes(calls):
+    if calls.empty or "model" not in calls:
+        return pd.DataFrame()
+    calls = calls[~calls["cache_hit"].fillna(False).astype(bool)]
+    if "coalesced" in calls:
+        calls = calls[~calls["coalesced"].fillna(False).astype(bool)]
+    if calls.empty:
+        return pd.DataFrame()
+    escalated = calls["escalated_from"].notna() if "escalated_from" in calls else pd.Series(False, index=calls.index)
+
+    # Baseline: every first try priced as a large-model call (escalations are pure overhead)
+    baseline_cost = calls[~escalated].apply(
+        lambda call: round(estimate_cost(LARGE_MODEL, call["prompt_tokens"], call["completion_tokens"],
+                                         call["cached_tokens"]), 6), axis=1)
+    calls = calls.assign(escalated=escalated, baseline_cost_usd=baseline_cost.reindex(calls.index).fillna(0.0))
+
+    rows = []
+    for (bot, stage), group in calls.groupby(["bot", "stage"]):
+        first_tries = group[~group["escalated"]]
+        large_calls = group[(group["model"] == LARGE_MODEL) & ~group["escalated"]]
+        small_calls = first_tries[first_tries["model"] != LARGE_MODEL]
+        rows.append({
+            "bot": bot,
+            "stage": stage,
+            "calls": len(first_tries),
+            "small_model_share": round(len(small_calls) / len(first_tries), 3) if len(first_tries) else 0.0,
+            "escalation_rate": round(group["escalated"].sum() / len(small_calls), 3) if len(small_calls) else 0.0,
+            "cost_usd": round(group["cost_usd"].sum(), 5),
+            "baseline_cost_usd": round(group["baseline_cost_usd"].sum(), 5),
+            "p50_small_s": round(small_calls["seconds"].median(), 3) if len(small_calls) else None,
+            "p50_large_s": round(large_calls["seconds"].median(), 3) if len(large_calls) else None,
+        })
+    summary = pd.DataFrame(rows)
+    summary["savings_usd"] = (summary["baseline_cost_usd"] - summary["cost_usd"]).round(5)
+    return summary
@@ -0,0 +1,251 @@
+"""
+Global scheduler of GPT calls, shared by all sessions of a server process.
+
+Every call waits for a ticket: at most `max_concurrency` calls run at once and token
+buckets keep requests & tokens per minute under the provider's limits. Waiting calls are
+served by priority (final > preliminary / interpretation > validation) and, within a
+priority, round-robin over sessions, so one heavy user can't starve the others.
+
+Limits: TAROT_LLM_RPM, TAROT_LLM_TPM (unset or 0 = unlimited) and TAROT_LLM_CONCURRENCY.
+The buckets are shared by all models, so set them to the limits of the smallest tier in use.
+"""
+import contextvars
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+import streamlit as st
+
+from tarot_ai.metrics import get_metrics
+
+# Provider limits (requests & tokens per minute; off unless set) and calls in flight
+RPM = int(os.environ.get("TAROT_LLM_RPM", 0))
+TPM = int(os.environ.get("TAROT_LLM_TPM", 0))
+MAX_CONCURRENCY = int(os.environ.get("TAROT_LLM_CONCURRENCY", 16))
+
+# Lower is served first
+STAGE_PRIORITY = {"final": 0, "personalization": 0, "single_call": 0, "preliminary": 1, "interpretation": 1,
+                  "validation": 2}
+DEFAULT_PRIORITY = 1
+
+# Expected answer length per stage, until the real usage is known
+COMPLETION_TOKENS = {"validation": 20, "interpretation": 600, "preliminary": 600, "final": 900,
+                     "personalization": 900, "single_call": 1000}
+DEFAULT_COMPLETION_TOKENS = 500
+
+WAIT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30)
+
+# Session (user) of the calls made in this context; pages & the service set it per reading
+current_session = contextvars.ContextVar("tarot_session", default="anonymous")
+
+
+@contextmanager
+def session_scope(session_id):
+    token = current_session.set(session_id or "anonymous")
+    try:
+        yield
+    finally:
+        current_session.reset(token)
+
+
+# Rough prompt size (~4 characters per token)
+def estimate_tokens(messages, stage=None):
+    prompt_tokens = sum(len(message["content"]) for message in messages) // 4
+    return prompt_tokens + COMPLETION_TOKENS.get(stage, DEFAULT_COMPLETION_TOKENS)
+
+
+class TokenBucket:
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    # Seconds until `amount` is available (0 -> can take it now)
+    def wait_time(self, amount, now):
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount):
+        self.level -= min(amount, self.capacity)
+
+    # Correct an estimate once the real usage is known (the level may go below 0)
+    def adjust(self, amount):
+        self.level = min(self.capacity, self.level - amount)
+
+
+class Ticket:
+    def __init__(self, session, stage, tokens):
+        self.session = session
+        self.stage = stage
+        self.priority = STAGE_PRIORITY.get(stage, DEFAULT_PRIORITY)
+        self.tokens = tokens
+        self.enqueued = time.monotonic()
+        self.wait_seconds = 0.0
+
+
+class LLMScheduler:
+    def __init__(self, rpm=RPM, tpm=TPM, max_concurrency=MAX_CONCURRENCY):
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.max_concurrency = max_concurrency
+        self._cond = threading.Condition()
+        # priority -> session -> waiting tickets (session order is the round-robin order)
+        self._queues = {}
+        self._waiting = 0
+        self._running = 0
+        self.max_queue_depth = 0
+        self.throttled = 0
+        self.wait_sum = 0.0
+        self.wait_count = 0
+        self.wait_buckets = [0] * len(WAIT_BUCKETS)
+
+    def _next(self):
+        for priority in sorted(self._queues):
+            sessions = self._queues[priority]
+            if sessions:
+                return next(iter(sessions.values()))[0]
+        return None
+
+    def _remove(self, ticket):
+        sessions = self._queues[ticket.priority]
+        queue = sessions.pop(ticket.session)
+        queue.popleft()
+        # The session goes to the back of the line if it has more calls waiting
+        if queue:
+            sessions[ticket.session] = queue
+        self._waiting -= 1
+
+    # Seconds until the rate limits allow the ticket (0 -> take it now)
+    def _rate_wait(self, ticket):
+        now = time.monotonic()
+        wait = 0.0
+        if self.requests:
+            wait = max(wait, self.requests.wait_time(1, now))
+        if self.tokens:
+            wait = max(wait, self.tokens.wait_time(ticket.tokens, now))
+        return wait
+
+    def acquire(self, stage, tokens, session=None):
+        ticket = Ticket(session or current_session.get(), stage, tokens)
+        with self._cond:
+            self._queues.setdefault(ticket.priority, OrderedDict()).setdefault(ticket.session, deque()).append(ticket)
+            self._waiting += 1
+            self.max_queue_depth = max(self.max_queue_depth, self._waiting)
+
+            throttled = False
+            while True:
+                if self._next() is ticket and self._running < self.max_concurrency:
+                    wait = self._rate_wait(ticket)
+                    if wait == 0:
+                        break
+                    throttled = True
+                    self._cond.wait(wait)
+                else:
+                    self._cond.wait()
+
+            if self.requests:
+                self.requests.take(1)
+            if self.tokens:
+                self.tokens.take(ticket.tokens)
+            self._remove(ticket)
+            self._running += 1
+            self.throttled += throttled
+
+            ticket.wait_seconds = time.monotonic() - ticket.enqueued
+            self.wait_sum += ticket.wait_seconds
+            self.wait_count += 1
+            for i, bound in enumerate(WAIT_BUCKETS):
+                if ticket.wait_seconds <= bound:
+                    self.wait_buckets[i] += 1
+            # The next ticket in line may be able to go as well
+            self._cond.notify_all()
+        return ticket
+
+    def release(self, ticket):
+        with self._cond:
+            self._running -= 1
+            self._cond.notify_all()
+
+    # Replace the token estimate of a call with its real usage
+    def settle(self, ticket, total_tokens):
+        if self.tokens and total_tokens:
+            with self._cond:
+                self.tokens.adjust(total_tokens - ticket.tokens)
+                ticket.tokens = total_tokens
+
+    # Wait for a ticket, hold it during the call: `with scheduler.slot(stage, messages) as ticket:`
+    @contextmanager
+    def slot(self, stage, messages, session=None):
+        ticket = self.acquire(stage, estimate_tokens(messages, stage), session)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def stats(self):
+        with self._cond:
+            depth = {priority: sum(len(queue) for queue in sessions.values())
+                     for priority, sessions in sorted(self._queues.items())}
+            return {
+                "queue_depth": self._waiting,
+                "queue_depth_by_priority": depth,
+                "max_queue_depth": self.max_queue_depth,
+                "running": self._running,
+                "calls": self.wait_count,
+                "throttled_calls": self.throttled,
+                "mean_wait_s": round(self.wait_sum / self.wait_count, 4) if self.wait_count else 0.0,
+                "limits": {"rpm": self.requests.capacity if self.requests else None,
+                           "tpm": self.tokens.capacity if self.tokens else None,
+                           "concurrency": self.max_concurrency},
+            }
+
+    # Queue depth & wait time in the Prometheus text format (appended to the call metrics)
+    def prometheus_text(self):
+        with self._cond:
+            lines = [
+                "# HELP tarot_llm_queue_depth GPT calls waiting for the scheduler",
+                "# TYPE tarot_llm_queue_depth gauge",
+                f"tarot_llm_queue_depth {self._waiting}",
+                "# HELP tarot_llm_running GPT calls in flight",
+                "# TYPE tarot_llm_running gauge",
+                f"tarot_llm_running {self._running}",
+                "# HELP tarot_llm_queue_wait_seconds Time GPT calls waited for the scheduler",
+                "# TYPE tarot_llm_queue_wait_seconds histogram",
+            ]
+            for bound, value in zip(WAIT_BUCKETS, self.wait_buckets):
+                lines.append(f'tarot_llm_queue_wait_seconds_bucket{{le="{bound}"}} {value}')
+            lines.append(f'tarot_llm_queue_wait_seconds_bucket{{le="+Inf"}} {self.wait_count}')
+            lines.append(f"tarot_llm_queue_wait_seconds_sum {self.wait_sum:.4f}")
+            lines.append(f"tarot_llm_queue_wait_seconds_count {self.wait_count}")
+        return "\n".join(lines) + "\n"
+
+
+_scheduler_override = None
+
+
+# One scheduler per server process (all sessions share the provider's limits)
+@st.cache_resource(show_spinner=False)
+def _get_default_scheduler():
+    scheduler = LLMScheduler()
+    get_metrics().add_collector(scheduler.prometheus_text)
+    return scheduler
+
+
+# Injection point for benchmarks (other limits than the provider's)
+def set_scheduler(scheduler):
+    global _scheduler_override
+    _scheduler_override = scheduler
+
+
+def get_scheduler():
+    if _scheduler_override is not None:
+        return _scheduler_override
+    return _get_default_scheduler()
@@ -0,0 +1,216 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from contextlib import nullcontext
+from logging.handlers import RotatingFileHandler
+
+import numpy as np
+import streamlit as st
+
+from tarot_ai.knowledge_base import CACHE_DIR
+from tarot_ai.llm import get_model_response, stream_model_response
+from tarot_ai.prefetch import record_unused
+from tarot_ai.prompts import PERSONALIZATION, VALIDATION, build_messages, format_user_input
+from tarot_ai.query_screener import validate_query
+from tarot_ai.retrieval import tokenize
+
+# Off by default: set TAROT_SEMANTIC_CACHE=1 to reuse readings of near-identical queries
+ENABLED = os.environ.get("TAROT_SEMANTIC_CACHE", "0") == "1"
+
+LOG_PATH = CACHE_DIR / 'semantic_cache.jsonl'
+LOG_MAX_BYTES = 2 * 2**20
+LOG_BACKUPS = 1
+
+VECTOR_SIZE = 1024  # hashed unigrams & bigrams of the story and question
+REUSE_THRESHOLD = 0.92  # same cards in the same order -> the cached reading as is
+PERSONALIZE_THRESHOLD = 0.75  # otherwise -> one GPT call adapts the cached reading
+MAX_ENTRIES = 2000  # least recently used readings are dropped first
+MAX_PER_KEY = 8  # readings kept per (bot, topic, cards)
+
+
+# Local text vector (hashing trick): no model, no vocabulary, ~0.1 ms per query
+def embed(story, question):
+    vector = np.zeros(VECTOR_SIZE, dtype=np.float32)
+    for text, weight in ((story, 1.0), (question, 2.0)):
+        terms = tokenize(text)
+        for term in terms + [f"{a} {b}" for a, b in zip(terms, terms[1:])]:
+            vector[zlib.crc32(term.encode('utf-8')) % VECTOR_SIZE] += weight
+    vector = np.log1p(vector)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class _Entry:
+    def __init__(self, cards, vector, reading):
+        self.cards = cards
+        self.vector = vector
+        self.reading = reading
+
+
+class SemanticCache:
+    def __init__(self, max_entries=MAX_ENTRIES, log_path=LOG_PATH):
+        self.max_entries = max_entries
+        self.log_path = log_path
+        # (bot, topic, sorted cards) -> readings, most recently used key last
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.reused = 0
+        self.personalized = 0
+
+        self.log_path.parent.mkdir(parents=True, exist_ok=True)
+        self._logger = logging.getLogger(f"{__name__}.lookups")
+        self._logger.propagate = False
+        self._logger.setLevel(logging.INFO)
+        if not self._logger.handlers:
+            handler = RotatingFileHandler(self.log_path, maxBytes=LOG_MAX_BYTES,
+                                          backupCount=LOG_BACKUPS, encoding='utf-8')
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self._logger.addHandler(handler)
+
+    @staticmethod
+    def key(bot, user_input):
+        cards = (user_input['card_1'], user_input['card_2'], user_input['card_3'])
+        return bot, user_input['topic'], tuple(sorted(cards))
+
+    # Best cached reading for the query -> ("reuse" | "personalize" | "miss", entry, similarity)
+    def lookup(self, bot, user_input):
+        key = self.key(bot, user_input)
+        vector = embed(user_input['story'], user_input['question'])
+        cards = (user_input['card_1'], user_input['card_2'], user_input['card_3'])
+
+        with self._lock:
+            self.lookups += 1
+            entries = self._entries.get(key)
+            best, similarity = None, 0.0
+            if entries:
+                self._entries.move_to_end(key)
+                similarities = np.stack([entry.vector for entry in entries]) @ vector
+                best = entries[int(similarities.argmax())]
+                similarity = float(similarities.max())
+
+            if best is not None and similarity >= REUSE_THRESHOLD and best.cards == cards:
+                outcome = "reuse"
+                self.reused += 1
+            elif best is not None and similarity >= PERSONALIZE_THRESHOLD:
+                outcome = "personalize"
+                self.personalized += 1
+            else:
+                outcome = "miss"
+        self._log(bot, user_input, outcome, similarity)
+        return outcome, best, similarity
+
+    def add(self, bot, user_input, reading):
+        key = self.key(bot, user_input)
+        entry = _Entry((user_input['card_1'], user_input['card_2'], user_input['card_3']),
+                       embed(user_input['story'], user_input['question']), reading)
+        with self._lock:
+            entries = self._entries.setdefault(key, [])
+            self._entries.move_to_end(key)
+            entries.append(entry)
+            self._size += 1
+            if len(entries) > MAX_PER_KEY:
+                entries.pop(0)
+                self._size -= 1
+            # Evict whole least recently used keys until the cache fits
+            while self._size > self.max_entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    # Hit rate & similarity of every lookup (to tune the thresholds against reading quality);
+    # rotated log, written outside the cache lock. No user text: the query is logged as a hash
+    def _log(self, bot, user_input, outcome, similarity):
+        query = f"{user_input['story']}\n{user_input['question']}"
+        self._logger.info(json.dumps({
+            "time": time.time(),
+            "bot": bot,
+            "topic": user_input['topic'],
+            "query_hash": hashlib.sha256(query.encode('utf-8')).hexdigest()[:16],
+            "outcome": outcome,
+            "similarity": round(similarity, 4),
+        }))
+
+    def stats(self):
+        hits = self.reused + self.personalized
+        return {
+            "enabled": ENABLED,
+            "entries": self._size,
+            "keys": len(self._entries),
+            "lookups": self.lookups,
+            "reused": self.reused,
+            "personalized": self.personalized,
+            "hit_rate": round(hits / self.lookups, 3) if self.lookups else 0.0,
+        }
+
+
+# One cache per server process, shared by all sessions
+@st.cache_resource(show_spinner=False)
+def get_semantic_cache():
+    return SemanticCache()
+
+
+def _personalization_messages(entry, user_input):
+    return build_messages(PERSONALIZATION, f"""
+    Prediction:
+    {entry.reading}
+
+    {format_user_input(user_input)}
+    """)
+
+
+def _store_when_done(cache, bot, user_input, chunks):
+    parts = []
+    for text in chunks:
+        parts.append(text)
+        yield text
+    cache.add(bot, user_input, "".join(parts))
+
+
+# generate_prediction of a bot behind the semantic cache (same arguments & return value)
+def generate_with_cache(bot, generate, user_input, timeline=None, stream=False, progress=None, **options):
+    if not ENABLED:
+        return generate(user_input, timeline=timeline, stream=stream, progress=progress, **options)
+
+    cache = get_semantic_cache()
+    outcome, entry, _ = cache.lookup(bot, user_input)
+    if outcome != "miss":
+        # A hit is only served to a query that passes the validation, like any reading
+        with timeline.stage("validation") if timeline else nullcontext():
+            validation_response = validate_query(
+                user_input, build_messages(VALIDATION, format_user_input(user_input, cards=False)), bot=bot)
+        prefetched = options.get("prefetched_interpretation")
+        # The prefetched stage isn't needed (cancelled if not started yet)
+        called = prefetched is not None and not prefetched.cancel()
+        if "cannot make a prediction" in validation_response:
+            if prefetched is not None:
+                record_unused("query rejected", called=called)
+            return validation_response
+        if prefetched is not None:
+            record_unused("cache hit", called=called)
+
+    if outcome == "reuse":
+        return entry.reading
+
+    # Personalized readings aren't cached: later hits adapt a real generation, not an adaptation
+    if outcome == "personalize":
+        if progress is not None:
+            progress("📖 Adapting a reading of a similar query")
+        messages = _personalization_messages(entry, user_input)
+        if stream:
+            return stream_model_response(messages, stage="personalization", timeline=timeline, bot=bot)
+        with timeline.stage("personalization") if timeline else nullcontext():
+            return get_model_response(messages, stage="personalization", bot=bot)
+
+    prediction = generate(user_input, timeline=timeline, stream=stream, progress=progress, **options)
+    if isinstance(prediction, str):
+        # Rejected queries are not readings
+        if "cannot make a prediction" not in prediction:
+            cache.add(bot, user_input, prediction)
+        return prediction
+    return _store_when_done(cache, bot, user_input, prediction)
@@ -0,0 +1,335 @@
+"""
+Prediction service: the bots' pipelines behind an asyncio HTTP/JSON API.
+
+    python -m tarot_ai.service --port 8800 --workers 8 --queue 16 --base-url http://127.0.0.1:8900/v1
+
+    POST /v1/predictions  {"bot", "topic", "story", "question", "card_1", "card_2", "card_3", "stream", "session",
+                           "single_call"}
+    GET  /health | /stats
+
+Cards are drawn by the service when they're missing. The pipelines (synchronous OpenAI
+client) run in a pool of --workers threads; at most --queue more readings wait and any
+further request gets 429 with Retry-After instead of piling up. With "stream": true the
+answer is NDJSON: {"event": "cards" | "progress" | "token" | "done" | "error", ...} per line.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+from openai import OpenAI
+
+from tarot_ai import llm
+from tarot_ai.bots import hybrid, keyword_based, prompt_based, summarization_based
+from tarot_ai.cards import normalize_card
+from tarot_ai.knowledge_base import TOPICS, get_knowledge_base
+from tarot_ai.scheduler import get_scheduler, session_scope
+from tarot_ai.semantic_cache import generate_with_cache
+from tarot_ai.timeline import StageTimeline
+
+logger = logging.getLogger(__name__)
+
+# Sent to clients when a reading fails; the details stay in the server log
+INTERNAL_ERROR = "The prediction failed, please try again later."
+
+BOTS = {
+    prompt_based.BOT: prompt_based.generate_prediction,
+    keyword_based.BOT: keyword_based.generate_prediction,
+    summarization_based.BOT: summarization_based.generate_prediction,
+    hybrid.BOT: hybrid.generate_prediction,
+}
+
+MAX_BODY_BYTES = 64 * 1024
+RETRY_AFTER_SECONDS = 2
+
+
+class BadRequest(ValueError):
+    pass
+
+
+# Request JSON -> (bot, user_input, options)
+def parse_prediction_request(payload):
+    if not isinstance(payload, dict):
+        raise BadRequest("the body must be a JSON object")
+    bot = payload.get("bot")
+    if bot not in BOTS:
+        raise BadRequest(f"unknown bot {bot!r}, expected one of {sorted(BOTS)}")
+    if payload.get("topic") not in TOPICS:
+        raise BadRequest(f"unknown topic {payload.get('topic')!r}, expected one of {TOPICS}")
+    for field in ("story", "question"):
+        if not isinstance(payload.get(field), str):
+            raise BadRequest(f"{field!r} must be a string")
+
+    names = [payload.get(f"card_{i}") for i in (1, 2, 3)]
+    if any(names):
+        cards = [normalize_card(name) if isinstance(name, str) else None for name in names]
+        if None in cards or len(set(cards)) != 3:
+            raise BadRequest("card_1, card_2 & card_3 must be three different known cards")
+    else:
+        cards = random.sample(list(get_knowledge_base().cards), 3)
+
+    user_input = {
+        "topic": payload["topic"],
+        "story": payload["story"],
+        "question": payload["question"],
+        "card_1": cards[0],
+        "card_2": cards[1],
+        "card_3": cards[2]
+    }
+    options = {"session": payload.get("session") if isinstance(payload.get("session"), str) else None}
+    if bot == prompt_based.BOT and "concurrent" in payload:
+        options["concurrent"] = bool(payload["concurrent"])
+    if "single_call" in payload:
+        options["single_call"] = bool(payload["single_call"])
+    return bot, user_input, options
+
+
+class PredictionService:
+    def __init__(self, workers=8, queue_size=16):
+        self.workers = workers
+        self.capacity = workers + queue_size
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="reading")
+        # Readings admitted (running or waiting for a worker, until the worker is done even if the
+        # client left); only touched on the event loop
+        self.admitted = 0
+        self.counters = {"accepted": 0, "rejected": 0, "completed": 0, "failed": 0}
+        self._running = 0
+        self._lock = threading.Lock()
+        self.server = None
+
+    def stats(self):
+        with self._lock:
+            running = self._running
+        return {
+            **self.counters,
+            "running": running,
+            "queued": self.admitted - running,
+            "workers": self.workers,
+            "capacity": self.capacity,
+        }
+
+    # --- pipeline (worker threads) ---
+
+    def _run(self, bot, user_input, options, stream=False, emit=None):
+        options = dict(options)
+        session = options.pop("session", None)
+        with self._lock:
+            self._running += 1
+        # GPT calls of the reading are scheduled fairly per client session
+        try:
+            with session_scope(session):
+                timeline = StageTimeline()
+                if not stream:
+                    prediction = generate_with_cache(bot, BOTS[bot], user_input, timeline=timeline, **options)
+                    return {"prediction": prediction, "cards": _cards(user_input), "timeline": timeline.stages}
+
+                emit({"event": "cards", "cards": _cards(user_input)})
+                prediction = generate_with_cache(bot, BOTS[bot], user_input, timeline=timeline, stream=True,
+                                                 progress=lambda step: emit({"event": "progress", "step": step}),
+                                                 **options)
+                if isinstance(prediction, str):
+                    emit({"event": "token", "text": prediction})
+                else:
+                    for text in prediction:
+                        if not emit({"event": "token", "text": text}):
+                            # The client went away: closing the generator closes the GPT stream
+                            prediction.close()
+                            return None
+                emit({"event": "done", "timeline": timeline.stages})
+        finally:
+            with self._lock:
+                self._running -= 1
+
+    # --- HTTP (event loop) ---
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                await self.dispatch(method, path, body, writer)
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except BadRequest as error:
+            await _send_json(writer, HTTPStatus.BAD_REQUEST, {"error": str(error)}, close=True)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, method, path, body, writer):
+        path = path.split("?", 1)[0].rstrip("/")
+        if method == "GET" and path == "/health":
+            return await _send_json(writer, HTTPStatus.OK, {"status": "ok"})
+        if method == "GET" and path == "/stats":
+            return await _send_json(writer, HTTPStatus.OK, {**self.stats(), "scheduler": get_scheduler().stats()})
+        if path != "/v1/predictions":
+            return await _send_json(writer, HTTPStatus.NOT_FOUND, {"error": "not found"})
+        if method != "POST":
+            return await _send_json(writer, HTTPStatus.METHOD_NOT_ALLOWED, {"error": "use POST"})
+
+        try:
+            payload = json.loads(body or b"{}")
+            bot, user_input, options = parse_prediction_request(payload)
+        except (ValueError, UnicodeDecodeError) as error:
+            return await _send_json(writer, HTTPStatus.BAD_REQUEST, {"error": str(error)})
+
+        # Backpressure: refuse instead of queueing without bound
+        if self.admitted >= self.capacity:
+            self.counters["rejected"] += 1
+            return await _send_json(writer, HTTPStatus.TOO_MANY_REQUESTS,
+                                    {"error": "all readers are busy, try again later"},
+                                    headers={"Retry-After": str(RETRY_AFTER_SECONDS)})
+
+        self.counters["accepted"] += 1
+        try:
+            if payload.get("stream"):
+                await self._stream(writer, bot, user_input, options)
+            else:
+                # Shielded: a client that goes away doesn't stop the reading (nor its admission)
+                result = await asyncio.shield(self._submit(bot, user_input, options))
+                await _send_json(writer, HTTPStatus.OK, result)
+            self.counters["completed"] += 1
+        except (ConnectionError, asyncio.CancelledError):
+            self.counters["failed"] += 1
+            raise
+        except Exception:
+            self.counters["failed"] += 1
+            logger.exception("Prediction failed")
+            await _send_json(writer, HTTPStatus.INTERNAL_SERVER_ERROR, {"error": INTERNAL_ERROR})
+
+    # Run a reading on a worker; it counts as admitted until the worker is done with it
+    def _submit(self, *args):
+        self.admitted += 1
+        future = asyncio.get_running_loop().run_in_executor(self.executor, self._run, *args)
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, future):
+        self.admitted -= 1
+
+    async def _stream(self, writer, bot, user_input, options):
+        loop = asyncio.get_running_loop()
+        events = asyncio.Queue()
+        connected = threading.Event()
+        connected.set()
+
+        # Called from the worker thread; False once the client is gone
+        def emit(event):
+            if connected.is_set():
+                loop.call_soon_threadsafe(events.put_nowait, event)
+            return connected.is_set()
+
+        future = self._submit(bot, user_input, options, True, emit)
+        future.add_done_callback(lambda _: events.put_nowait(None))
+
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\n"
+                     b"Transfer-Encoding: chunked\r\nCache-Control: no-cache\r\n\r\n")
+        try:
+            while (event := await events.get()) is not None:
+                line = (json.dumps(event) + "\n").encode('utf-8')
+                writer.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+                await writer.drain()
+
+            error = future.exception()
+            if error is not None:
+                logger.error("Prediction failed", exc_info=error)
+                line = (json.dumps({"event": "error", "error": INTERNAL_ERROR}) + "\n").encode('utf-8')
+                writer.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            connected.clear()
+            raise
+
+    async def serve(self, host="127.0.0.1", port=8800, ready=None):
+        self.server = await asyncio.start_server(self.handle_connection, host, port)
+        logger.info("Prediction service on %s", self.base_url)
+        if ready is not None:
+            ready.set()
+        async with self.server:
+            await self.server.serve_forever()
+
+    @property
+    def base_url(self):
+        host, port = self.server.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}"
+
+
+def _cards(user_input):
+    return [user_input["card_1"], user_input["card_2"], user_input["card_3"]]
+
+
+# One HTTP/1.1 request -> (method, path, headers, body), None when the client closed the connection
+async def _read_request(reader):
+    request_line = await reader.readline()
+    if not request_line.strip():
+        return None
+    try:
+        method, path, _ = request_line.decode('latin-1').split()
+    except ValueError:
+        raise BadRequest("malformed request line")
+
+    headers = {}
+    while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+        name, _, value = line.decode('latin-1').partition(":")
+        headers[name.strip().lower()] = value.strip()
+        if len(headers) > 100:
+            raise BadRequest("too many headers")
+
+    length = headers.get("content-length") or "0"
+    if not (length.isascii() and length.isdigit()):
+        raise BadRequest("invalid Content-Length")
+    length = int(length)
+    if length > MAX_BODY_BYTES:
+        raise BadRequest("request body too large")
+    body = await reader.readexactly(length) if length else b""
+    return method, path, headers, body
+
+
+async def _send_json(writer, status, payload, headers=None, close=False):
+    body = json.dumps(payload).encode('utf-8')
+    lines = [f"HTTP/1.1 {status.value} {status.phrase}", "Content-Type: application/json",
+             f"Content-Length: {len(body)}"]
+    lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+    if close:
+        lines.append("Connection: close")
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode('latin-1') + body)
+    await writer.drain()
+
+
+# Run the service on its own event loop thread (benchmarks & local tests)
+def start_service(host="127.0.0.1", port=0, workers=8, queue_size=16):
+    service = PredictionService(workers, queue_size)
+    ready = threading.Event()
+    threading.Thread(target=asyncio.run, args=(service.serve(host, port, ready),), daemon=True).start()
+    ready.wait()
+    return service
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tarot AI prediction service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--workers", type=int, default=8, help="readings running at the same time")
+    parser.add_argument("--queue", type=int, default=16, help="readings waiting for a worker before 429")
+    parser.add_argument("--base-url", help="OpenAI-compatible endpoint (e.g. the mock server)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    # Without --base-url the client comes from .streamlit/secrets.toml like in the app
+    if args.base_url:
+        llm.set_client(OpenAI(api_key=os.environ.get("OPENAI_API_KEY", "local"), base_url=args.base_url))
+
+    service = PredictionService(args.workers, args.queue)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print("Stats:", service.stats())
@@ -0,0 +1,92 @@
+import json
+import os
+
+import requests
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from tarot_ai.scheduler import session_scope
+from tarot_ai.semantic_cache import generate_with_cache
+from tarot_ai.service import BOTS
+
+BUSY_MESSAGE = "All our tarot readers are busy right now. Please try again in a moment."
+
+# Connect + read timeout of one request to the prediction service (a reading takes a few GPT calls)
+TIMEOUT = (5, 120)
+
+
+# URL of the prediction service ("backend_url" secret or TAROT_BACKEND_URL);
+# without it the pages run the pipelines in the Streamlit process
+def get_backend_url():
+    url = os.environ.get("TAROT_BACKEND_URL")
+    if url is None:
+        try:
+            url = st.secrets.get("backend_url")
+        except FileNotFoundError:
+            url = None
+    return url.rstrip("/") if url else None
+
+
+# Keep-alive connections to the service, shared by all sessions
+@st.cache_resource(show_spinner=False)
+def get_session():
+    return requests.Session()
+
+
+# Streamlit session of the current script run (the scheduler's unit of fairness)
+def get_session_id():
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else None
+
+
+# Same contract as the bots' generate_prediction: a string, or a generator of text chunks if stream=True
+def generate_prediction(bot, user_input, timeline=None, stream=False, progress=None, **options):
+    backend_url = get_backend_url()
+    if backend_url is None:
+        with session_scope(get_session_id()):
+            return generate_with_cache(bot, BOTS[bot], user_input, timeline=timeline, stream=stream,
+                                       progress=progress, **options)
+
+    if progress is None:
+        progress = lambda step: None
+    # A prefetched stage is a Future of this process; the service runs its own stages
+    options.pop("prefetched_interpretation", None)
+    payload = {"bot": bot, **user_input, **options, "stream": stream, "session": get_session_id()}
+    response = get_session().post(f"{backend_url}/v1/predictions", json=payload, stream=stream, timeout=TIMEOUT)
+    if response.status_code == 429:
+        response.close()
+        return BUSY_MESSAGE
+    response.raise_for_status()
+
+    if not stream:
+        result = response.json()
+        if timeline is not None:
+            timeline.extend(result["timeline"])
+        return result["prediction"]
+
+    # Progress steps arrive before the first token; the rest is read lazily by the chat bubble
+    events = (json.loads(line) for line in response.iter_lines() if line)
+    for event in events:
+        if event["event"] == "progress":
+            progress(event["step"])
+        elif event["event"] == "token":
+            return _stream_tokens(event["text"], events, timeline, response)
+        elif event["event"] == "error":
+            response.close()
+            raise RuntimeError(f"Prediction service error: {event['error']}")
+    response.close()
+    return ""
+
+
+def _stream_tokens(first_text, events, timeline, response):
+    try:
+        yield first_text
+        for event in events:
+            if event["event"] == "token":
+                yield event["text"]
+            elif event["event"] == "done" and timeline is not None:
+                timeline.extend(event["timeline"])
+            elif event["event"] == "error":
+                raise RuntimeError(f"Prediction service error: {event['error']}")
+    finally:
+        response.close()
@@ -0,0 +1,85 @@
+# Single-call mode of the bots: validation, interpretation & final formatting in one GPT call
+# with a JSON-schema answer, rendered into the usual '**Card №N: name**' structure
+import json
+import logging
+import os
+
+from tarot_ai.llm import get_model_response
+from tarot_ai.prompts import SINGLE_CALL_PREDICTION, build_messages, format_user_input
+from tarot_ai.query_screener import REJECT_RESPONSE, get_query_screener
+
+logger = logging.getLogger(__name__)
+
+# Default mode of the bots (TAROT_SINGLE_CALL=1); the pages & the service can also ask for it per reading
+ENABLED = os.environ.get("TAROT_SINGLE_CALL", "0") == "1"
+
+STAGE = "single_call"
+
+PREDICTION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "valid": {"type": "boolean"},
+        "beginning": {"type": "string"},
+        "card_1": {"type": "string"},
+        "card_2": {"type": "string"},
+        "card_3": {"type": "string"},
+        "conclusion": {"type": "string"},
+    },
+    "required": ["valid", "beginning", "card_1", "card_2", "card_3", "conclusion"],
+    "additionalProperties": False,
+}
+
+RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {"name": "tarot_prediction", "strict": True, "schema": PREDICTION_SCHEMA},
+}
+
+
+# Answer fields -> prediction text (card names come from the input, so they're always right)
+def render_prediction(answer, user_input):
+    parts = [answer['beginning'].strip()]
+    for number in (1, 2, 3):
+        parts.append(f"**Card №{number}: {user_input[f'card_{number}']}**\n{answer[f'card_{number}'].strip()}")
+    parts.append(answer['conclusion'].strip())
+    return "\n\n".join(part for part in parts if part)
+
+
+# card_data: the bot's material about the cards (keywords, summaries, ...), "" if none;
+# fallback() makes the prediction another way when the answer is refused or isn't valid JSON
+def generate_single_call(bot, user_input, card_data="", timeline=None, progress=None, fallback=None):
+    if progress is None:
+        progress = lambda step: None
+
+    # Clear-cut bad queries are still rejected locally, without the call
+    screener = get_query_screener()
+    decision = screener.screen(user_input)
+    if decision == "reject":
+        return REJECT_RESPONSE
+
+    messages = build_messages(SINGLE_CALL_PREDICTION, f"""
+    {format_user_input(user_input)}
+
+    {card_data.strip()}
+    """)
+
+    progress("✨ Reading the cards & writing your prediction")
+    with timeline.stage(STAGE):
+        content = get_model_response(messages, stage=STAGE, bot=bot, response_format=RESPONSE_FORMAT)
+
+    try:
+        answer = json.loads(content)
+    except (TypeError, ValueError):
+        answer = None
+    if not isinstance(answer, dict) or set(PREDICTION_SCHEMA['required']) - set(answer):
+        # No content: the model refused (message.refusal); invalid JSON: e.g. the answer was cut off
+        logger.warning("%s: no usable single-call answer (%s), %s", bot,
+                       "refused" if content is None else f"invalid: {content[:200]!r}",
+                       "falling back to the chain" if fallback else "rejecting the query")
+        return fallback() if fallback is not None else REJECT_RESPONSE
+
+    llm_decision = "accept" if answer['valid'] else "reject"
+    if decision is None:
+        screener.record(user_input, decision, llm_decision)
+    if not answer['valid']:
+        return REJECT_RESPONSE
+    return render_prediction(answer, user_input)
@@ -0,0 +1,80 @@
+import threading
+
+import streamlit as st
+
+from tarot_ai.metrics import get_metrics
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.followers = 0
+
+
+# Identical calls that overlap in time run once: the first caller (leader) makes the call,
+# the others wait for it and get the same result (or exception)
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.leaders = 0
+        self.saved = 0
+
+    # -> (result, shared); shared is True when another caller's call was reused
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+                leader = True
+            else:
+                call.followers += 1
+                self.saved += 1
+                leader = False
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            # Later callers start a new call (the answer itself is kept by the response cache)
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def stats(self):
+        with self._lock:
+            in_flight = len(self._calls)
+        total = self.leaders + self.saved
+        return {
+            "calls": self.leaders,
+            "saved_calls": self.saved,
+            "in_flight": in_flight,
+            "saved_rate": round(self.saved / total, 3) if total else 0.0,
+        }
+
+    def prometheus_text(self):
+        return (
+            "# HELP tarot_llm_coalesced_calls_total GPT calls answered by an identical call in flight\n"
+            "# TYPE tarot_llm_coalesced_calls_total counter\n"
+            f"tarot_llm_coalesced_calls_total {self.saved}\n"
+        )
+
+
+# One per server process: requests of all sessions are coalesced together
+@st.cache_resource(show_spinner=False)
+def get_singleflight():
+    singleflight = SingleFlight()
+    get_metrics().add_collector(singleflight.prometheus_text)
+    return singleflight
@@ -0,0 +1,186 @@
+# Local check of the final layout of a prediction: beginning, '**Card №1..3: card name**' with
+# the interpretations, conclusion. A draft that passes (after small deterministic fixes)
+# doesn't need the final GPT call that exists mainly to enforce this layout.
+import os
+import re
+import threading
+from collections import Counter, namedtuple
+
+import streamlit as st
+
+from tarot_ai.cards import matches_card
+from tarot_ai.metrics import get_metrics
+
+# Opt-in (TAROT_STRUCTURE_CHECK=1): drafts are then written by the final-stage model in the final
+# layout (tarot_ai.prompts, tarot_ai.routing), and a draft that passes is shown without the final call
+ENABLED = os.environ.get("TAROT_STRUCTURE_CHECK", "0") == "1"
+
+MIN_BEGINNING_WORDS = 8
+MIN_CARD_WORDS = 15
+MAX_PARAGRAPH_WORDS = 220
+MAX_NAME_WORDS = 6  # longer text after 'Card 1:' is the interpretation, not a card name
+
+# 'Card 1: ...', '**Card №1: The Fool**', '### Card No. 1 – The Fool', ...
+HEADER = re.compile(r"^[#>\s]*\**\s*card\s*(?:№|no\.?|number|#)?\s*([123])\b\s*\**\s*(?:[:.–—-]\s*)?(.*)$",
+                    re.IGNORECASE)
+# A conclusion opens like one or talks about the cards together (else it's more of card 3)
+CONCLUSION_START = re.compile(r"^[#*\s]*(?:in conclusion|conclusion|overall|in summary|to sum up|all in all|"
+                              r"ultimately|in the end|together|taken together|as you move forward|remember)\b",
+                              re.IGNORECASE)
+COLLECTIVE_CARDS = re.compile(r"\b(?:these(?: three| 3)? cards|(?:all|the) (?:three|3) cards)\b", re.IGNORECASE)
+# Leftovers of the prompts that a reader must never see
+DRAFT_MARKERS = re.compile(r"preliminary prediction|\(interpretation of|writing format|input data:", re.IGNORECASE)
+
+# passed: the text can be shown as is; issues: why not; fixes: what was changed
+StructureCheck = namedtuple("StructureCheck", ["passed", "text", "issues", "fixes"])
+
+
+def _paragraphs(text):
+    return [re.sub(r"[ \t]+\n", "\n", p).strip() for p in re.split(r"\n\s*\n", text.strip()) if p.strip()]
+
+
+# Header line -> (card name or None, text after the header)
+def _split_header(rest, card):
+    rest = rest.strip()
+    # '**Card №1:** The Fool': the name follows the closing '**'
+    if rest.startswith("**"):
+        rest = rest[2:].strip()
+    if "**" in rest:
+        name, _, text = rest.partition("**")
+        return name.strip(" *:–—-") or None, text.strip(" *")
+    if not rest:
+        return None, ""
+    # 'Card 1: The Fool – text' / 'Card 1: text'
+    for separator in (" – ", " — ", " - ", ": ", ". "):
+        name, found, text = rest.partition(separator)
+        if found and matches_card(name, card):
+            return name, text.strip()
+    if matches_card(rest, card) or (len(rest.split()) <= MAX_NAME_WORDS and not rest.endswith(".")):
+        return rest, ""
+    return None, rest
+
+
+def _is_conclusion(paragraph, cards):
+    if CONCLUSION_START.match(paragraph) or COLLECTIVE_CARDS.search(paragraph):
+        return True
+    return sum(bool(re.search(rf"\b{re.escape(card)}\b", paragraph, re.IGNORECASE)) for card in cards) >= 2
+
+
+def check_structure(text, cards):
+    issues, fixes = [], []
+    text = (text or "").replace("\r\n", "\n")
+    if DRAFT_MARKERS.search(text):
+        issues.append("draft markers")
+
+    # Split the text at the card headers
+    sections = {}
+    headers = {}
+    order = []
+    beginning, current = [], None
+    for line in text.split("\n"):
+        match = HEADER.match(line)
+        if match and len(line) < 200:
+            number = int(match.group(1))
+            if number in sections:
+                issues.append(f"card {number} twice")
+                break
+            name, rest = _split_header(match.group(2), cards[number - 1])
+            if name is not None and not matches_card(name, cards[number - 1]):
+                issues.append(f"wrong card {number}")
+            # The draft's spelling of a right card name is kept ('The Fool' for 'Fool')
+            canonical = f"**Card №{number}: {name if name is not None else cards[number - 1]}**"
+            if line.strip() != canonical:
+                fixes.append(f"header {number}")
+            headers[number] = canonical
+            sections[number] = [rest] if rest else []
+            order.append(number)
+            current = sections[number]
+        elif current is None:
+            beginning.append(line)
+        else:
+            current.append(line)
+
+    if order != [1, 2, 3]:
+        if len(order) == len(set(order)):
+            issues.append("cards out of order" if set(order) == {1, 2, 3} else "missing cards")
+        return StructureCheck(False, text, issues, fixes)
+
+    beginning = _paragraphs("\n".join(beginning))
+    card_paragraphs = {number: _paragraphs("\n".join(lines)) for number, lines in sections.items()}
+    if sum(len(p.split()) for p in beginning) < MIN_BEGINNING_WORDS:
+        issues.append("no beginning")
+    # The conclusion is the last paragraph after the third card, if it reads like one
+    last = card_paragraphs[3][-1] if len(card_paragraphs[3]) > 1 else None
+    conclusion = [last] if last is not None and _is_conclusion(last, cards) else []
+    if not conclusion:
+        issues.append("no conclusion")
+    else:
+        card_paragraphs[3] = card_paragraphs[3][:-1]
+    for number, paragraphs in card_paragraphs.items():
+        if sum(len(p.split()) for p in paragraphs) < MIN_CARD_WORDS:
+            issues.append(f"short card {number}")
+
+    paragraphs = beginning + [p for number in (1, 2, 3) for p in card_paragraphs[number]] + conclusion
+    if any(len(p.split()) > MAX_PARAGRAPH_WORDS for p in paragraphs):
+        issues.append("long paragraph")
+
+    # Same layout as the final stage: paragraphs split by one blank line, header right above its card
+    fixed = "\n\n".join(beginning)
+    for number in (1, 2, 3):
+        fixed += f"\n\n{headers[number]}\n" + "\n\n".join(card_paragraphs[number])
+    fixed += "\n\n" + "\n\n".join(conclusion)
+    fixed = fixed.strip()
+    if not fixes and fixed != text.strip():
+        fixes.append("spacing")
+    return StructureCheck(not issues, fixed, issues, fixes)
+
+
+class StructureChecker:
+    def __init__(self, enabled=ENABLED):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.checks = 0
+        self.passed = 0
+        self.fixed = 0
+        self.issues = Counter()
+
+    # Draft -> the prediction to show, or None if the final GPT call is still needed
+    def finalize(self, draft, user_input):
+        if not self.enabled:
+            return None
+        result = check_structure(draft, [user_input['card_1'], user_input['card_2'], user_input['card_3']])
+        with self._lock:
+            self.checks += 1
+            self.passed += result.passed
+            self.fixed += result.passed and bool(result.fixes)
+            self.issues.update(result.issues)
+        return result.text if result.passed else None
+
+    def stats(self):
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "checks": self.checks,
+                "avoided_calls": self.passed,
+                "fixed_locally": self.fixed,
+                "avoided_rate": round(self.passed / self.checks, 3) if self.checks else 0.0,
+                "issues": dict(self.issues.most_common()),
+            }
+
+    def prometheus_text(self):
+        return (
+            "# HELP tarot_structure_checks_total Drafts checked against the final layout\n"
+            "# TYPE tarot_structure_checks_total counter\n"
+            f"tarot_structure_checks_total {self.checks}\n"
+            "# HELP tarot_refinement_avoided_total Final GPT calls skipped because the draft had the final layout\n"
+            "# TYPE tarot_refinement_avoided_total counter\n"
+            f"tarot_refinement_avoided_total {self.passed}\n"
+        )
+
+
+# One checker per server process (counters for the metrics page)
+@st.cache_resource(show_spinner=False)
+def get_structure_checker():
+    checker = StructureChecker()
+    get_metrics().add_collector(checker.prometheus_text)
+    return checker
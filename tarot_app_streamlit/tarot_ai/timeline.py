@@ -0,0 +1,41 @@
+import threading
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+
+# Start / end of every pipeline stage, relative to the start of the reading
+class StageTimeline:
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.stages = []
+        self._lock = threading.Lock()
+
+    # The yielded dict can be filled with extra stage info (e.g. time to first token)
+    @contextmanager
+    def stage(self, name):
+        record = {"stage": name}
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            end = time.perf_counter()
+            record.update({
+                "start_s": round(start - self.started_at, 3),
+                "end_s": round(end - self.started_at, 3),
+                "duration_s": round(end - start, 3),
+            })
+            with self._lock:
+                self.stages.append(record)
+
+    # Stages measured elsewhere (e.g. by the prediction service)
+    def extend(self, records):
+        with self._lock:
+            self.stages.extend(records)
+
+    def total_seconds(self):
+        return max((s["end_s"] for s in self.stages), default=0.0)
+
+    def to_frame(self):
+        return pd.DataFrame(self.stages, columns=["stage", "start_s", "end_s", "duration_s", "ttft_s"])
@@ -0,0 +1,16 @@
+import streamlit as st
+
+
+# Write a prediction into the chat bubble (token by token if it's a stream)
+def write_prediction(prediction):
+    message = st.chat_message("assistant")
+    if isinstance(prediction, str):
+        message.write(prediction)
+        return prediction
+    return message.write_stream(prediction)
+
+
+# Start / end / time to first token of every stage
+def show_timeline(timeline):
+    with st.expander(f"⏱️ Stage timeline ({timeline.total_seconds():.1f} s)"):
+        st.dataframe(timeline.to_frame(), hide_index=True)
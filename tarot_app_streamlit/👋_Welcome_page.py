@@ -19,7 +19,7 @@ st.markdown(
 Create a bot for daily tarot card readings
 
 #### Overview
-The website includes three types of tarot bots:
+The website includes four types of tarot bots:
 """)
 
 st.write()
@@ -34,6 +34,10 @@ st.write()
 st.page_link("pages/3_⚙️_Summarization_Bot.py", label="Summarization Bot", icon="⚙️")
 st.write("This bot generates summaries from parsed tarot card meanings. It combines various summaries for a single cart, creating a single & general interpretation")
 
+st.write()
+st.page_link("pages/4_🔀_Hybrid_Bot.py", label="Hybrid Bot", icon="🔀")
+st.write("This bot combines keywords & summaries with the passages of parsed tarot card meanings that best match the user's story and question")
+
 
 st.markdown(
     """
@@ -49,8 +53,6 @@ Prompt-based or Summarization-based
 
 #### Future Developments
 
-- Create Hybrid version of Bot (Keyword & Summarization)
-
 - Creating training and test datasets for keyword extraction and summarization tasks
 
 - Building a larger database of parsed tarot card interpretations, categorized by different theme